@@ -0,0 +1,118 @@
+"""
+ColumnarReader.py - Stream one numeric column out of Parquet or Arrow files
+
+Only the selected column is read (column projection), one record batch at a
+time: Parquet files are streamed row group by row group, Arrow IPC files
+(.arrow, .feather) batch by batch. Each batch is handed out as a float64
+NumPy array, zero-copy when the column is already float64 without nulls, so
+callers can fold statistics over tens of millions of rows without ever
+holding the column, let alone a Python list, in memory.
+"""
+import os
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+BATCH_ROWS = 1 << 20  # rows per batch when streaming a Parquet column
+COLUMNAR_TYPES = ['parquet', 'arrow', 'feather']
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Reading Parquet or Arrow files needs pyarrow (pip install pyarrow)")
+
+
+def _is_parquet(source):
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    if str(name).lower().endswith('.parquet'):
+        return True
+    if str(name).lower().endswith(('.arrow', '.feather')):
+        return False
+    # Unknown name: Parquet files start with the magic bytes PAR1
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read(4) == b'PAR1'
+    position = source.tell()
+    magic = source.read(4)
+    source.seek(position)
+    return magic == b'PAR1'
+
+
+def _open_ipc(source):
+    if isinstance(source, (str, os.PathLike)):
+        # Memory-map local files so batches point straight into the page cache
+        return pa.ipc.open_file(pa.memory_map(str(source), 'r'))
+    return pa.ipc.open_file(source)
+
+
+def schema(source):
+    """Return the Arrow schema of a Parquet or Arrow IPC file without reading data."""
+    _require_pyarrow()
+    if _is_parquet(source):
+        return pq.ParquetFile(source).schema_arrow
+    return _open_ipc(source).schema
+
+
+def numeric_columns(source):
+    """Names of the integer and floating-point columns of a file."""
+    return [
+        field.name for field in schema(source)
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    ]
+
+
+def _to_float64(array):
+    array = pc.drop_null(array)
+    if not pa.types.is_float64(array.type):
+        # Unsafe: integers above 2**53 round to the nearest float instead of raising
+        array = pc.cast(array, pa.float64(), safe=False)
+    return array.to_numpy(zero_copy_only=False)
+
+
+def iter_column_batches(source, column, batch_rows=BATCH_ROWS):
+    """
+    Yield the non-null values of one column as float64 arrays, batch by batch.
+
+    Args:
+        source: path or binary file object of a Parquet or Arrow IPC file
+        column: name of a numeric column
+        batch_rows: rows per batch for Parquet files; Arrow files keep their own batches
+    """
+    _require_pyarrow()
+    if _is_parquet(source):
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=[column]):
+            yield _to_float64(batch.column(0))
+        return
+
+    reader = _open_ipc(source)
+    index = reader.schema.get_field_index(column)
+    if index < 0:
+        raise KeyError(f"No column named {column!r}")
+    for i in range(reader.num_record_batches):
+        yield _to_float64(reader.get_batch(i).column(index))
+
+
+def column_maximum(source, column, batch_rows=BATCH_ROWS):
+    """
+    Stream a column and return (maximum, position), or (None, None) if it
+    has no values other than nulls and NaNs.
+
+    NaN values are skipped but, like every other non-null value, counted in
+    the position from the start of the column; the first occurrence wins on ties.
+    """
+    maximum, position, offset = None, None, 0
+    for values in iter_column_batches(source, column, batch_rows):
+        if values.size and not np.isnan(values).all():
+            i = int(np.nanargmax(values))
+            if maximum is None or values[i] > maximum:
+                maximum, position = float(values[i]), offset + i
+        offset += values.size
+    return maximum, position
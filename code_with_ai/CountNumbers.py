@@ -1,23 +1,326 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
+import ColumnarReader
+import NumberParser
+
+CSV_CHUNK_ROWS = 1_000_000  # rows of the selected column read per CSV chunk
+CSV_PREVIEW_ROWS = 1000  # rows read to preview a CSV and detect its numeric columns
+EXACT_MEDIAN_LIMIT = 10_000_000  # values kept for an exact median before switching to a sketch
+CACHE_ENTRIES = 32  # results kept per cached function across reruns, least recently used evicted
+MAX_RANDOM_COUNT = 10_000_000  # largest count offered by the random generator
+ZERO_FRACTION = 0.05  # share of generated numbers set to zero for demonstration
+COLORS = {'Positive': '#2E8B57', 'Negative': '#DC143C', 'Zero': '#708090'}
+
+def generate_numbers(count, min_val, max_val, seed):
+    """
+    Draw count numbers uniformly from [min_val, max_val), about 5% set to zero.
+    
+    One call to a NumPy Generator seeded with seed draws a (2, count) block
+    of uniforms: the first row becomes the values, the second the zero mask.
+    The same count, bounds and seed therefore always give the same array,
+    on any machine with the same NumPy bit generator (PCG64).
+    """
+    draws = np.random.default_rng(int(seed)).random((2, count))
+    numbers = min_val + (max_val - min_val) * draws[0]
+    numbers[draws[1] < ZERO_FRACTION] = 0.0
+    return numbers
+
 def count_numbers(numbers):
-    """Count positive, negative, and zero numbers in a list."""
-    positive_count = 0
-    negative_count = 0
-    zero_count = 0
-    
-    for num in numbers:
-        if num > 0:
-            positive_count += 1
-        elif num < 0:
-            negative_count += 1
-        else:
-            zero_count += 1
+    """Count positive, negative, and zero numbers in a list or array."""
+    values = np.asarray(numbers, dtype=np.float64)
+    positive_count = int(np.count_nonzero(values > 0))
+    negative_count = int(np.count_nonzero(values < 0))
+    zero_count = values.size - positive_count - negative_count
     
     return positive_count, negative_count, zero_count
 
+def number_statistics(numbers):
+    """
+    Compute counts and summary statistics over a float64 array.
+    
+    The median uses np.partition, a linear-time selection, instead of a sort,
+    and reuses one scratch copy of the values for the signed sums.
+    
+    Returns:
+        dict with count, positive, negative, zero, min, max, mean, median,
+        positive_mean and negative_mean (None when there are no such values)
+    """
+    values = np.asarray(numbers, dtype=np.float64).ravel()
+    total = values.size
+    positive_count = int(np.count_nonzero(values > 0))
+    negative_count = int(np.count_nonzero(values < 0))
+    scratch = np.maximum(values, 0)
+    positive_sum = float(scratch.sum())
+    # Summed apart, not as total - positive, which cancels when magnitudes differ widely
+    negative_sum = float(np.minimum(values, 0, out=scratch).sum())
+    total_sum = float(values.sum())
+    
+    stats = {
+        'count': total,
+        'positive': positive_count,
+        'negative': negative_count,
+        'zero': total - positive_count - negative_count,
+        'min': None,
+        'max': None,
+        'mean': None,
+        'median': None,
+        'positive_mean': positive_sum / positive_count if positive_count else None,
+        'negative_mean': negative_sum / negative_count if negative_count else None,
+    }
+    if total:
+        np.copyto(scratch, values)
+        stats.update(
+            min=float(values.min()),
+            max=float(values.max()),
+            mean=total_sum / total,
+            median=_median_in_place(scratch),
+        )
+    return stats
+
+def _median_in_place(values):
+    """Median of a non-empty array that may be reordered."""
+    upper = values.size // 2
+    values.partition(upper)
+    # For an even count the lower middle value is the largest one left of upper
+    lower_value = values[upper] if values.size % 2 else values[:upper].max()
+    return float(lower_value + values[upper]) / 2
+
+class QuantileSketch:
+    """
+    Mergeable KLL-style sketch for approximate quantiles of a stream.
+    
+    Items on level i stand for 2**i values. A level holding more than
+    capacity items is sorted and every other item moves up a level, so
+    memory stays O(capacity * log(n / capacity)) and the rank error is
+    a small multiple of n / capacity.
+    """
+    
+    def __init__(self, capacity=4096, seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+    
+    def add(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64).ravel()])
+        self._compact()
+        return self
+    
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compact()
+        return self
+    
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                # An odd item out stays behind so no weight is lost
+                kept, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1],
+                                                         items[self._rng.integers(2)::2]])
+            level += 1
+    
+    def quantile(self, q):
+        """Approximate q-quantile, 0 <= q <= 1, or None when empty."""
+        items = np.concatenate(self.levels)
+        if not items.size:
+            return None
+        weights = np.concatenate([np.full(len(l), 2.0 ** i) for i, l in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        ranks = np.cumsum(weights[order])
+        position = min(int(np.searchsorted(ranks, q * ranks[-1])), items.size - 1)
+        return float(items[order[position]])
+
+class RunningStats:
+    """
+    Mergeable accumulator of the number_statistics fields over chunks.
+    
+    Counts, sums, min and max are exact. Values are kept for an exact median
+    until more than exact_limit have been seen; after that the median comes
+    from a QuantileSketch. The first and last values are kept for previews.
+    """
+    
+    def __init__(self, exact_limit=EXACT_MEDIAN_LIMIT, preview_size=25):
+        self.exact_limit = exact_limit
+        self.preview_size = preview_size
+        self.count = self.positive = self.negative = 0
+        self.total_sum = self.positive_sum = self.negative_sum = 0.0
+        self.min = self.max = None
+        self.head = np.empty(0)  # first 2 * preview_size values
+        self.tail = np.empty(0)  # last preview_size values
+        self.sketch = None
+        self._chunks = []  # values kept while the median is exact
+    
+    def add(self, values):
+        """Add a chunk of values; NaNs should be dropped by the caller."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not values.size:
+            return self
+        chunk = RunningStats(self.exact_limit, self.preview_size)
+        chunk.count = values.size
+        chunk.positive = int(np.count_nonzero(values > 0))
+        chunk.negative = int(np.count_nonzero(values < 0))
+        chunk.total_sum = float(values.sum())
+        chunk.positive_sum = float(np.maximum(values, 0).sum())
+        chunk.negative_sum = float(np.minimum(values, 0).sum())
+        chunk.min, chunk.max = float(values.min()), float(values.max())
+        chunk.head = values[:2 * self.preview_size].copy()
+        chunk.tail = values[-self.preview_size:].copy()
+        chunk._chunks = [values]
+        return self.merge(chunk)
+    
+    def merge(self, other):
+        """Fold another accumulator, covering the values after ours, into this one."""
+        if not other.count:
+            return self
+        self.count += other.count
+        self.positive += other.positive
+        self.negative += other.negative
+        self.total_sum += other.total_sum
+        self.positive_sum += other.positive_sum
+        self.negative_sum += other.negative_sum
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.head = np.concatenate([self.head, other.head])[:2 * self.preview_size]
+        self.tail = np.concatenate([self.tail, other.tail])[-self.preview_size:]
+        
+        if self.sketch is None and other.sketch is None and self.count <= self.exact_limit:
+            self._chunks.extend(other._chunks)
+            return self
+        if self.sketch is None:
+            self.sketch = QuantileSketch()
+            for values in self._chunks:
+                self.sketch.add(values)
+            self._chunks = []
+        if other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        for values in other._chunks:
+            self.sketch.add(values)
+        return self
+    
+    def statistics(self):
+        """Return the number_statistics dict, plus whether the median is exact."""
+        stats = {
+            'count': self.count,
+            'positive': self.positive,
+            'negative': self.negative,
+            'zero': self.count - self.positive - self.negative,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total_sum / self.count if self.count else None,
+            'median': None,
+            'positive_mean': self.positive_sum / self.positive if self.positive else None,
+            'negative_mean': self.negative_sum / self.negative if self.negative else None,
+            'median_exact': self.sketch is None,
+        }
+        if self.sketch is not None:
+            stats['median'] = self.sketch.quantile(0.5)
+        elif self.count:
+            stats['median'] = _median_in_place(np.concatenate(self._chunks))
+        return stats
+
+def read_csv_statistics(file, column, chunksize=CSV_CHUNK_ROWS, **options):
+    """
+    Stream one numeric column of a CSV file into a RunningStats.
+    
+    Only the selected column is parsed, straight to float64, a chunk of rows
+    at a time, so memory does not grow with the number of rows.
+    """
+    stats = RunningStats(**options)
+    for chunk in pd.read_csv(file, usecols=[column], dtype={column: np.float64}, chunksize=chunksize):
+        values = chunk[column].to_numpy()
+        stats.add(values[~np.isnan(values)])
+    return stats
+
+def read_columnar_statistics(source, column, **options):
+    """Stream one column of a Parquet or Arrow file, batch by batch, into a RunningStats."""
+    stats = RunningStats(**options)
+    for values in ColumnarReader.iter_column_batches(source, column):
+        stats.add(values[~np.isnan(values)])
+    return stats
+
+# Cached steps: Streamlit reruns the whole script on every widget change, so
+# parsing, statistics and figures are memoized on their inputs. Uploads are
+# keyed by their file_id, which changes whenever a new file is uploaded, and
+# the file object itself (underscore argument) is not hashed.
+
+def summarize_numbers(numbers):
+    """Return (statistics, first 50 values, last 25 values) of an array."""
+    numbers = np.asarray(numbers, dtype=np.float64)
+    return number_statistics(numbers), numbers[:50].copy(), numbers[-25:].copy()
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def summarize_text(text):
+    """
+    Parse numbers separated by commas, spaces or new lines and summarize them.
+    
+    Returns:
+        (summary, invalid tokens as reported by NumberParser.parse_numbers)
+    """
+    numbers, invalid = NumberParser.parse_numbers(text)
+    return summarize_numbers(numbers), invalid
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def preview_csv(file_id, _file):
+    _file.seek(0)
+    return pd.read_csv(_file, nrows=CSV_PREVIEW_ROWS)
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Reading column...")
+def summarize_csv(file_id, column, _file):
+    _file.seek(0)
+    accumulator = read_csv_statistics(_file, column)
+    return accumulator.statistics(), accumulator.head, accumulator.tail
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Reading column...")
+def summarize_columnar(file_id, column, _file):
+    _file.seek(0)
+    accumulator = read_columnar_statistics(_file, column)
+    return accumulator.statistics(), accumulator.head, accumulator.tail
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def summarize_random(count, min_val, max_val, seed):
+    return summarize_numbers(generate_numbers(count, min_val, max_val, seed))
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def build_count_charts(positive_count, negative_count, zero_count):
+    """Pie and bar charts of the counts by number type."""
+    counts_data = {
+        'Type': ['Positive', 'Negative', 'Zero'],
+        'Count': [positive_count, negative_count, zero_count],
+        'Color': list(COLORS.values())
+    }
+    
+    fig_pie = px.pie(
+        counts_data, 
+        values='Count', 
+        names='Type',
+        title='Distribution of Number Types',
+        color='Type',
+        color_discrete_map=COLORS
+    )
+    
+    fig_bar = px.bar(
+        counts_data,
+        x='Type',
+        y='Count',
+        title='Count by Number Type',
+        color='Type',
+        color_discrete_map=COLORS
+    )
+    fig_bar.update_layout(showlegend=False)
+    return fig_pie, fig_bar
+
 def main():
     st.set_page_config(
         page_title="Number Counter",
@@ -32,10 +335,10 @@ def main():
     st.sidebar.header("Input Options")
     input_method = st.sidebar.radio(
         "Choose input method:",
-        ["Manual Entry", "Upload CSV", "Random Generator"]
+        ["Manual Entry", "Upload CSV", "Upload Parquet/Arrow", "Random Generator"]
     )
     
-    numbers = []
+    summary = None  # (statistics, first values, last values)
     
     if input_method == "Manual Entry":
         st.subheader("Enter Numbers")
@@ -48,20 +351,13 @@ def main():
         )
         
         if numbers_text:
-            try:
-                # Parse the input text
-                import re
-                # Split by comma, space, or newline
-                number_strings = re.split(r'[,\s\n]+', numbers_text.strip())
-                numbers = [float(num.strip()) for num in number_strings if num.strip()]
-                
-                if not numbers:
-                    st.warning("Please enter valid numbers.")
-                    return
-                    
-            except ValueError:
+            summary, invalid = summarize_text(numbers_text)
+            
+            if not summary[0]['count']:
                 st.error("Please enter valid numbers separated by commas, spaces, or new lines.")
                 return
+            if invalid:
+                st.warning(NumberParser.describe_invalid(invalid))
     
     elif input_method == "Upload CSV":
         st.subheader("Upload CSV File")
@@ -69,7 +365,7 @@ def main():
         
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
+                df = preview_csv(uploaded_file.file_id, uploaded_file)
                 st.write("CSV Preview:")
                 st.dataframe(df.head())
                 
@@ -78,7 +374,8 @@ def main():
                 
                 if numeric_columns:
                     selected_column = st.selectbox("Select the column with numbers:", numeric_columns)
-                    numbers = df[selected_column].dropna().tolist()
+                    # Stream only the selected column through the accumulator
+                    summary = summarize_csv(uploaded_file.file_id, selected_column, uploaded_file)
                 else:
                     st.error("No numeric columns found in the CSV file.")
                     return
@@ -87,32 +384,53 @@ def main():
                 st.error(f"Error reading CSV file: {str(e)}")
                 return
     
+    elif input_method == "Upload Parquet/Arrow":
+        st.subheader("Upload Parquet or Arrow File")
+        uploaded_file = st.file_uploader("Choose a Parquet or Arrow file", type=ColumnarReader.COLUMNAR_TYPES)
+        
+        if uploaded_file is not None:
+            try:
+                # Only the schema is read here; the selected column is streamed below
+                numeric_columns = ColumnarReader.numeric_columns(uploaded_file)
+                
+                if numeric_columns:
+                    selected_column = st.selectbox("Select the column with numbers:", numeric_columns)
+                    summary = summarize_columnar(uploaded_file.file_id, selected_column, uploaded_file)
+                else:
+                    st.error("No numeric columns found in the file.")
+                    return
+                    
+            except Exception as e:
+                st.error(f"Error reading file: {str(e)}")
+                return
+    
     elif input_method == "Random Generator":
         st.subheader("Generate Random Numbers")
         
         col1, col2 = st.columns(2)
         with col1:
-            count = st.slider("Number of random numbers:", 10, 1000, 100)
+            count = st.slider("Number of random numbers:", 10, MAX_RANDOM_COUNT, 100, step=10)
             min_val = st.number_input("Minimum value:", value=-100.0)
         with col2:
-            seed = st.number_input("Random seed (for reproducibility):", value=42, step=1)
+            seed = st.number_input("Random seed (for reproducibility):", min_value=0, value=42, step=1)
             max_val = st.number_input("Maximum value:", value=100.0)
         
+        st.caption("The same seed (a whole number from 0 up), count and range always generate the same numbers.")
+        
+        params = (count, min_val, max_val, int(seed))
         if st.button("Generate Numbers"):
-            import random
-            random.seed(int(seed))
-            numbers = [random.uniform(min_val, max_val) for _ in range(count)]
-            # Add some zeros for demonstration
-            for _ in range(count // 20):
-                numbers[random.randint(0, len(numbers)-1)] = 0.0
+            st.session_state.random_params = params
+        # Keep showing generated numbers on later reruns until an input changes
+        if st.session_state.get("random_params") == params:
+            summary = summarize_random(*params)
     
     # Process and display results
-    if numbers:
+    if summary is not None and summary[0]['count']:
         st.subheader("Results")
         
-        # Count the numbers
-        positive_count, negative_count, zero_count = count_numbers(numbers)
-        total_count = len(numbers)
+        stats, first_numbers, last_numbers = summary
+        positive_count, negative_count, zero_count = stats['positive'], stats['negative'], stats['zero']
+        total_count = stats['count']
         
         # Display summary statistics
         col1, col2, col3, col4 = st.columns(4)
@@ -132,55 +450,23 @@ def main():
         # Create visualization
         col1, col2 = st.columns(2)
         
+        fig_pie, fig_bar = build_count_charts(positive_count, negative_count, zero_count)
         with col1:
-            # Pie chart
-            counts_data = {
-                'Type': ['Positive', 'Negative', 'Zero'],
-                'Count': [positive_count, negative_count, zero_count],
-                'Color': ['#2E8B57', '#DC143C', '#708090']
-            }
-            
-            fig_pie = px.pie(
-                counts_data, 
-                values='Count', 
-                names='Type',
-                title='Distribution of Number Types',
-                color='Type',
-                color_discrete_map={
-                    'Positive': '#2E8B57',
-                    'Negative': '#DC143C', 
-                    'Zero': '#708090'
-                }
-            )
             st.plotly_chart(fig_pie, use_container_width=True)
         
         with col2:
-            # Bar chart
-            fig_bar = px.bar(
-                counts_data,
-                x='Type',
-                y='Count',
-                title='Count by Number Type',
-                color='Type',
-                color_discrete_map={
-                    'Positive': '#2E8B57',
-                    'Negative': '#DC143C',
-                    'Zero': '#708090'
-                }
-            )
-            fig_bar.update_layout(showlegend=False)
             st.plotly_chart(fig_bar, use_container_width=True)
         
         # Detailed breakdown
         st.subheader("Detailed Information")
         
         # Show some sample numbers
-        if len(numbers) <= 50:
+        if total_count <= 50:
             st.write("**Your numbers:**")
-            st.write(numbers)
+            st.write(first_numbers.tolist())
         else:
-            st.write(f"**First 25 numbers:** {numbers[:25]}")
-            st.write(f"**Last 25 numbers:** {numbers[-25:]}")
+            st.write(f"**First 25 numbers:** {first_numbers[:25].tolist()}")
+            st.write(f"**Last 25 numbers:** {last_numbers.tolist()}")
         
         # Statistics table
         stats_df = pd.DataFrame({
@@ -197,32 +483,24 @@ def main():
         st.table(stats_df)
         
         # Additional statistics
-        if numbers:
+        if total_count:
             st.subheader("Additional Statistics")
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("Minimum Value", f"{min(numbers):.2f}")
-                st.metric("Maximum Value", f"{max(numbers):.2f}")
+                st.metric("Minimum Value", f"{stats['min']:.2f}")
+                st.metric("Maximum Value", f"{stats['max']:.2f}")
             
             with col2:
-                avg = sum(numbers) / len(numbers)
-                st.metric("Average", f"{avg:.2f}")
-                
-                # Median
-                sorted_nums = sorted(numbers)
-                n = len(sorted_nums)
-                median = (sorted_nums[n//2] + sorted_nums[(n-1)//2]) / 2
-                st.metric("Median", f"{median:.2f}")
+                st.metric("Average", f"{stats['mean']:.2f}")
+                median_label = "Median" if stats.get('median_exact', True) else "Median (approx.)"
+                st.metric(median_label, f"{stats['median']:.2f}")
             
             with col3:
-                positive_nums = [n for n in numbers if n > 0]
-                negative_nums = [n for n in numbers if n < 0]
-                
-                if positive_nums:
-                    st.metric("Avg Positive", f"{sum(positive_nums)/len(positive_nums):.2f}")
-                if negative_nums:
-                    st.metric("Avg Negative", f"{sum(negative_nums)/len(negative_nums):.2f}")
+                if stats['positive_mean'] is not None:
+                    st.metric("Avg Positive", f"{stats['positive_mean']:.2f}")
+                if stats['negative_mean'] is not None:
+                    st.metric("Avg Negative", f"{stats['negative_mean']:.2f}")
     
     else:
         st.info("Please enter some numbers to get started!")
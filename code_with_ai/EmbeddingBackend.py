@@ -0,0 +1,277 @@
+"""
+EmbeddingBackend.py - Pluggable CPU inference backends for sentence embeddings
+
+Backends share one method, ``encode(texts) -> np.ndarray`` of normalized
+float32 rows, so EmbeddingService can use either:
+
+    sentence-transformers  the full PyTorch SentenceTransformer
+    onnx                   ONNX Runtime over an exported model directory, with
+                           optional dynamic int8 quantization
+
+The backend is chosen with environment variables so every app picks it up:
+
+    EMBEDDING_BACKEND     sentence-transformers (default) or onnx
+    EMBEDDING_MODEL_DIR   local model directory; nothing is downloaded when set
+    EMBEDDING_THREADS     intra-op threads for inference
+    EMBEDDING_QUANTIZE    1 to use the dynamically quantized int8 ONNX model
+
+Run ``python EmbeddingBackend.py export DIR`` to write an ONNX model and
+tokenizer for all-MiniLM-L6-v2 into DIR, and
+``python EmbeddingBackend.py benchmark DIR`` to compare load time, latency,
+memory and embedding agreement of the backends.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MAX_SEQ_LENGTH = 256
+BENCHMARK_TIMEOUT = 600  # seconds one backend may take to load and run
+BENCHMARK_SENTENCES = [
+    "I need to write a research paper",
+    "I'm introducing someone at a business meeting",
+    "I need to create a phone directory",
+    "I'm addressing a formal letter",
+    "The quick brown fox jumps over the lazy dog",
+    "Reverse each word in this sentence please",
+]
+
+
+def _normalize_rows(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+
+class SentenceTransformerBackend:
+    """Embeddings from the PyTorch SentenceTransformer model."""
+
+    def __init__(self, model_name_or_path, threads=None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name_or_path, device='cpu')
+
+    def encode(self, texts):
+        return _normalize_rows(self.model.encode(list(texts)))
+
+
+class OnnxBackend:
+    """Embeddings from an ONNX export run with ONNX Runtime on the CPU."""
+
+    def __init__(self, model_dir, quantize=False, threads=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = self._find_model(model_dir)
+        if quantize:
+            model_path = self._quantized_model(model_path)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    @staticmethod
+    def _find_model(model_dir):
+        for candidate in ('model.onnx', os.path.join('onnx', 'model.onnx')):
+            path = os.path.join(model_dir, candidate)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No model.onnx found in {model_dir}")
+
+    @staticmethod
+    def _quantized_model(model_path):
+        """Return the dynamically int8-quantized model, creating it on first use."""
+        quantized_path = model_path[:-len('.onnx')] + '_int8.onnx'
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    def encode(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            inputs['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, as the sentence-transformers model does
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return _normalize_rows(pooled)
+
+
+def backend_settings(backend=None, model_dir=None, quantize=None):
+    """Return (backend, model_dir, quantize), filling unset options from the environment.
+
+    These decide the embeddings a backend produces, so caches of embeddings
+    should be keyed by them.
+    """
+    backend = backend or os.environ.get('EMBEDDING_BACKEND', 'sentence-transformers')
+    model_dir = model_dir or os.environ.get('EMBEDDING_MODEL_DIR')
+    if quantize is None:
+        quantize = os.environ.get('EMBEDDING_QUANTIZE') == '1'
+    return backend, model_dir, quantize
+
+
+def load_backend(model_name='all-MiniLM-L6-v2', backend=None, model_dir=None, threads=None,
+                 quantize=None):
+    """Create an embedding backend, filling unset options from the environment."""
+    backend, model_dir, quantize = backend_settings(backend, model_dir, quantize)
+    threads = threads or int(os.environ.get('EMBEDDING_THREADS', 0)) or None
+
+    if backend == 'sentence-transformers':
+        return SentenceTransformerBackend(model_dir or model_name, threads)
+    if backend == 'onnx':
+        if not model_dir:
+            raise ValueError("The onnx backend needs a local model directory (EMBEDDING_MODEL_DIR)")
+        return OnnxBackend(model_dir, quantize, threads)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def export_onnx(output_dir, model_name='sentence-transformers/all-MiniLM-L6-v2'):
+    """Export a transformer and its tokenizer to ``output_dir`` for the onnx backend."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(output_dir)
+    model = AutoModel.from_pretrained(model_name).eval()
+    # Keep the PyTorch weights too so the sentence-transformers backend can load the same directory
+    model.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(sample[name] for name in input_names),
+                          os.path.join(output_dir, 'model.onnx'),
+                          input_names=input_names, output_names=['last_hidden_state'],
+                          dynamic_axes=dynamic_axes, opset_version=14)
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 if sys.platform.startswith('linux') else peak / 1024 / 1024
+
+
+def _measure_backend(options, repeats, results):
+    """Load one backend in a fresh process and time it (runs in a child process).
+
+    Puts ('ok', measurements) on the results queue, or ('error', message) if
+    the backend fails, so the parent never waits on a result that won't come.
+    """
+    try:
+        results.put(('ok', _time_backend(options, repeats)))
+    except Exception as e:
+        results.put(('error', f"{type(e).__name__}: {e}"))
+
+
+def _time_backend(options, repeats):
+    start = time.perf_counter()
+    backend = load_backend(**options)
+    load_seconds = time.perf_counter() - start
+
+    embeddings = backend.encode(BENCHMARK_SENTENCES)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sentence in BENCHMARK_SENTENCES:
+            backend.encode([sentence])
+    latency_ms = (time.perf_counter() - start) * 1000 / (repeats * len(BENCHMARK_SENTENCES))
+    return load_seconds, latency_ms, _peak_rss_mb(), embeddings
+
+
+def _wait_for_result(worker, results, timeout):
+    """Return the child's (status, payload), or an error if it dies or runs out of time."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not worker.is_alive():
+                # A crash (segfault, OOM kill) exits without putting anything
+                return 'error', f"worker exited with code {worker.exitcode}"
+    worker.terminate()
+    return 'error', f"timed out after {timeout:.0f}s"
+
+
+def main():
+    """Export an ONNX model or benchmark the backends against each other."""
+    parser = argparse.ArgumentParser(description="Embedding backends for the sentence-transformer apps")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export = subcommands.add_parser("export", help="write an ONNX model and tokenizer to a directory")
+    export.add_argument("model_dir")
+    export.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    benchmark = subcommands.add_parser("benchmark", help="compare backends loaded from a model directory")
+    benchmark.add_argument("model_dir")
+    benchmark.add_argument("--threads", type=int, default=1)
+    benchmark.add_argument("--repeats", type=int, default=20)
+    benchmark.add_argument("--tolerance", type=float, default=0.99,
+                           help="minimum cosine similarity to the PyTorch embeddings")
+    benchmark.add_argument("--timeout", type=float, default=BENCHMARK_TIMEOUT,
+                           help="seconds each backend may take before it is skipped")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model_dir, args.model)
+        print(f"Exported {args.model} to {args.model_dir}")
+        return
+
+    configurations = [
+        ("sentence-transformers", {'backend': 'sentence-transformers'}),
+        ("onnx float32", {'backend': 'onnx', 'quantize': False}),
+        ("onnx int8", {'backend': 'onnx', 'quantize': True}),
+    ]
+    context = multiprocessing.get_context("spawn")
+    reference = None
+    print(f"{'backend':22} | {'load s':>7} | {'ms/text':>8} | {'peak RSS MB':>11} | min cosine")
+    print("-" * 70)
+    for label, options in configurations:
+        results = context.Queue()
+        worker = context.Process(target=_measure_backend, args=(
+            {**options, 'model_dir': args.model_dir, 'threads': args.threads}, args.repeats, results))
+        worker.start()
+        status, payload = _wait_for_result(worker, results, args.timeout)
+        worker.join()
+        if status == 'error':
+            print(f"{label:22} | failed: {payload}")
+            continue
+        load_seconds, latency_ms, rss_mb, embeddings = payload
+
+        # Agreement is only measured against the PyTorch embeddings
+        if options['backend'] == 'sentence-transformers':
+            reference = embeddings
+        if reference is None:
+            agreement = "no reference"
+        else:
+            min_cosine = float(np.min(np.sum(reference * embeddings, axis=1)))
+            agreement = f"{min_cosine:.4f} {'ok' if min_cosine >= args.tolerance else 'MISMATCH'}"
+        print(f"{label:22} | {load_seconds:7.2f} | {latency_ms:8.2f} | {rss_mb:11.0f} | {agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+EmbeddingService.py - Shared micro-batching front end for embedding models
+
+Concurrent callers submit single texts and get futures back. A worker thread
+collects requests until ``max_batch_size`` is reached or ``max_wait_ms`` has
+passed since the first one arrived, then runs one ``encode`` for the batch.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()
+
+
+class EmbeddingService:
+    """Gather concurrent embedding requests into batched encode calls."""
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = {'requests': 0, 'batches': 0}
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+        self._worker.start()
+
+    def submit(self, text):
+        """Queue one text and return a Future resolving to its embedding."""
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, texts):
+        """Embed a list of texts through the batcher and return a 2-D array."""
+        futures = [self.submit(text) for text in texts]
+        return np.array([future.result() for future in futures])
+
+    def encode_batch(self, texts):
+        """Embed a large list in one model call, bypassing the micro-batcher."""
+        return np.asarray(self.model.encode(list(texts)))
+
+    def close(self):
+        """Finish queued requests and stop the worker thread."""
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    @property
+    def mean_batch_size(self):
+        return self.stats['requests'] / self.stats['batches'] if self.stats['batches'] else 0.0
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect_batch(item)
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                vectors = self.model.encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.stats['requests'] += len(batch)
+            self.stats['batches'] += 1
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name='all-MiniLM-L6-v2', **options):
+    """Return the process-wide service for a model, loading it on first use.
+
+    The inference backend is picked by EmbeddingBackend.load_backend from the
+    EMBEDDING_* environment variables.
+    """
+    with _services_lock:
+        if model_name not in _services:
+            from EmbeddingBackend import load_backend
+            _services[model_name] = EmbeddingService(load_backend(model_name), **options)
+        return _services[model_name]
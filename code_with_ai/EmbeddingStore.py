@@ -0,0 +1,299 @@
+"""
+EmbeddingStore.py - Persistent, memory-mapped store of embeddings and records
+
+Layout for a store at ``<base>``:
+
+    <base>.json          manifest: vector size and current generation
+    <base>.<gen>.vec     raw float32 rows, one normalized vector per row
+    <base>.<gen>.log     append-only JSON lines, one record per committed row
+
+A row only counts once its log line is complete, so a crash between writing
+the vector and the record leaves an orphan row that is ignored and later
+dropped by ``compact``. Writers serialize through a lock file; readers map
+the vector file read-only and only touch the pages they scan.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive inter-process lock on ``path``."""
+    with open(path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_write(path, data, mode='ab'):
+    with open(path, mode) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class EmbeddingStore:
+    """Shared on-disk memory of (embedding, input, output) records."""
+
+    def __init__(self, base_path, dim=None, key_func=None):
+        self.base_path = base_path
+        self.dim = dim
+        self.key_func = key_func or (lambda text: text)
+        self.generation = None
+        self.records = {}  # row -> (input, output)
+        self._rows_by_key = {}  # key_func(input) -> latest live row
+        self._live = bytearray()  # row -> 1 while its record is live
+        self._vectors = None
+        self._log_offset = 0
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(os.path.abspath(base_path))
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self.records)
+
+    @property
+    def _manifest_path(self):
+        return f"{self.base_path}.json"
+
+    @property
+    def _lock_path(self):
+        return f"{self.base_path}.lock"
+
+    def _vec_path(self, generation):
+        return f"{self.base_path}.{generation}.vec"
+
+    def _log_path(self, generation):
+        return f"{self.base_path}.{generation}.log"
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, generation):
+        tmp_path = f"{self._manifest_path}.tmp"
+        _fsync_write(tmp_path, json.dumps({'dim': self.dim, 'generation': generation}).encode(), 'wb')
+        os.replace(tmp_path, self._manifest_path)
+
+    def _reset(self, generation):
+        self.generation = generation
+        self.records = {}
+        self._rows_by_key = {}
+        self._live = bytearray()
+        self._vectors = None
+        self._log_offset = 0
+
+    def refresh(self):
+        """Pick up records appended or compacted by other sessions and processes."""
+        with self._lock:
+            manifest = self._read_manifest()
+            if manifest is None:
+                return
+            if self.dim is None:
+                self.dim = manifest['dim']
+            elif manifest['dim'] != self.dim:
+                raise ValueError(f"Store {self.base_path} holds vectors of size {manifest['dim']}")
+            if manifest['generation'] != self.generation:
+                self._reset(manifest['generation'])
+            self._read_new_records()
+
+    def _read_new_records(self):
+        try:
+            with open(self._log_path(self.generation), 'rb') as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b'\n') + 1  # ignore a torn final line
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            if 'delete' in record:
+                row = record['delete']
+                sentence, _ = self.records.pop(row, (None, None))
+                if sentence is not None and self._rows_by_key.get(self.key_func(sentence)) == row:
+                    del self._rows_by_key[self.key_func(sentence)]
+                self._live[row] = 0
+            else:
+                row = record['row']
+                self.records[row] = (record['input'], record['output'])
+                self._rows_by_key[self.key_func(record['input'])] = row
+                if row >= len(self._live):
+                    self._live.extend(bytes(row + 1 - len(self._live)))
+                self._live[row] = 1
+        self._log_offset += end
+
+    def get(self, sentence):
+        """
+        Return (row, input, output, vector) for an input with the same key, or None.
+
+        The vector is copied under the same lock as the lookup, since a row
+        number is only valid until another process compacts the store.
+        """
+        with self._lock:
+            self.refresh()
+            row = self._rows_by_key.get(self.key_func(sentence))
+            vectors = self._vector_matrix()
+            if row is None or vectors is None or row >= len(vectors):
+                return None
+            return (row, *self.records[row], np.array(vectors[row]))
+
+    def _vector_matrix(self):
+        """Map the vector file, remapping when other writers have grown it."""
+        row_bytes = self.dim * 4
+        try:
+            rows = os.path.getsize(self._vec_path(self.generation)) // row_bytes
+        except (FileNotFoundError, TypeError):
+            return None
+        if rows == 0:
+            return None
+        if self._vectors is None or len(self._vectors) != rows:
+            self._vectors = np.memmap(self._vec_path(self.generation), dtype=np.float32,
+                                      mode='r', shape=(rows, self.dim))
+        return self._vectors
+
+    def _repair_tail(self):
+        """Drop a torn vector or log line left by a crashed writer."""
+        row_bytes = self.dim * 4
+        vec_path = self._vec_path(self.generation)
+        size = os.path.getsize(vec_path)
+        if size % row_bytes:
+            os.truncate(vec_path, size - size % row_bytes)
+
+        log_path = self._log_path(self.generation)
+        with open(log_path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b'\n'):
+            os.truncate(log_path, data.rfind(b'\n') + 1)
+
+    def append(self, vector, sentence, output):
+        """Durably append a record and return its row."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        with self._lock, _file_lock(self._lock_path):
+            if self.dim is None:
+                self.dim = vector.shape[0]
+            if self._read_manifest() is None:
+                _fsync_write(self._vec_path(0), b'')
+                _fsync_write(self._log_path(0), b'')
+                self._write_manifest(0)
+            self.refresh()
+            if vector.shape[0] != self.dim:
+                raise ValueError(f"Expected vector of size {self.dim}, got {vector.shape[0]}")
+
+            self._repair_tail()
+            row = os.path.getsize(self._vec_path(self.generation)) // (self.dim * 4)
+            _fsync_write(self._vec_path(self.generation), vector.tobytes())
+            record = {'row': row, 'input': sentence, 'output': output}
+            _fsync_write(self._log_path(self.generation),
+                         json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+            self._read_new_records()
+            return row
+
+    def delete(self, row):
+        """Mark a record as deleted; its space is reclaimed by ``compact``."""
+        with self._lock, _file_lock(self._lock_path):
+            self.refresh()
+            if row not in self.records:
+                return
+            _fsync_write(self._log_path(self.generation), json.dumps({'delete': row}).encode() + b'\n')
+            self._read_new_records()
+
+    def search(self, query, k=1, threshold=None, chunk_rows=65536):
+        """
+        Scan the mapped vectors in chunks for the records most similar to ``query``.
+
+        Returns:
+            List of (row, input, output, score), best match first
+        """
+        with self._lock:
+            self.refresh()
+            vectors = self._vector_matrix()
+            if vectors is None or not self.records or k <= 0:
+                return []
+            query = np.asarray(query, dtype=np.float32).reshape(-1)
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+
+            live = np.frombuffer(bytes(self._live), dtype=np.bool_)
+            best_rows = np.empty(0, dtype=np.int64)
+            best_scores = np.empty(0, dtype=np.float32)
+            for start in range(0, min(len(live), len(vectors)), chunk_rows):
+                scores = np.asarray(vectors[start:start + chunk_rows]) @ query
+                rows = np.arange(start, start + len(scores))
+                # Orphaned and deleted rows are scanned too; drop them here
+                mask = live[start:start + len(scores)]
+                best_rows = np.concatenate([best_rows, rows[mask]])
+                best_scores = np.concatenate([best_scores, scores[mask]])
+                if len(best_scores) > k:
+                    keep = np.argpartition(-best_scores, k - 1)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+            results = []
+            for i in np.argsort(-best_scores):
+                if threshold is not None and best_scores[i] < threshold:
+                    break
+                row = int(best_rows[i])
+                results.append((row, *self.records[row], float(best_scores[i])))
+            return results
+
+    def compact(self):
+        """Rewrite the store without deleted or orphaned rows."""
+        with self._lock, _file_lock(self._lock_path):
+            self.refresh()
+            if self.generation is None or self._vector_matrix() is None:
+                return
+            old_generation = self.generation
+            new_generation = old_generation + 1
+            vectors = self._vector_matrix()
+
+            with open(self._vec_path(new_generation), 'wb') as vec_file, \
+                    open(self._log_path(new_generation), 'wb') as log_file:
+                for new_row, row in enumerate(sorted(self.records)):
+                    vec_file.write(np.asarray(vectors[row]).tobytes())
+                    sentence, output = self.records[row]
+                    record = {'row': new_row, 'input': sentence, 'output': output}
+                    log_file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+                for f in (vec_file, log_file):
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._write_manifest(new_generation)
+            self._reset(new_generation)
+            self._read_new_records()
+
+            for path in (self._vec_path(old_generation), self._log_path(old_generation)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # still mapped by another process on some platforms
@@ -1,4 +1,16 @@
+import heapq
+import itertools
+from collections import deque
+
 import streamlit as st
+import numpy as np
+
+import ColumnarReader
+import NumberParser
+
+CACHE_ENTRIES = 32  # results kept per cached function across reruns, least recently used evicted
+STREAM_HISTORY = 1000  # samples kept for the live stream chart
+PREVIEW_LIMIT = 50  # numbers shown in the input preview and the step-by-step trace
 
 def find_maximum(numbers):
     """
@@ -21,12 +33,148 @@ def find_maximum(numbers):
     
     return maximum
 
+def _top_k_array(values, k):
+    """The k largest values of a NaN-free array as (value, index) pairs, largest first."""
+    n = values.size
+    k = min(k, n)
+    if k == 0:
+        return []
+    if k == 1:
+        index = int(values.argmax())
+        return [(float(values[index]), index)]
+    
+    # Linear-time selection of the k-th largest value, then every value above it
+    kth = values[np.argpartition(values, n - k)[n - k]]
+    above = np.flatnonzero(values > kth)
+    # Among values equal to the k-th largest, the earliest ones win
+    chosen = np.concatenate([above, np.flatnonzero(values == kth)[:k - len(above)]])
+    chosen = chosen[np.lexsort((chosen, -values[chosen]))]
+    return [(float(values[i]), int(i)) for i in chosen]
+
+def _top_k_stream(numbers, k):
+    # Min-heap of the k best (value, -index) keys seen so far; earlier index wins ties
+    heap = []
+    for index, num in enumerate(numbers):
+        key = (num, -index)
+        if len(heap) < k:
+            heapq.heappush(heap, key)
+        elif key > heap[0]:
+            heapq.heapreplace(heap, key)
+    return [(value, -negative_index) for value, negative_index in sorted(heap, reverse=True)]
+
+def reduce_maximum(numbers, k=1):
+    """
+    Find the maximum, its position and the k largest values.
+    
+    Lists, tuples and arrays are reduced as a float64 array with argmax and
+    np.argpartition; other iterables are consumed once with a heap of size
+    k. Ties go to the earliest position, as in find_maximum, which stays the
+    reference implementation.
+    
+    Args:
+        numbers: Array, list or any iterable of numbers (no NaNs)
+        k: How many of the largest values to return
+        
+    Returns:
+        (maximum, index, top) with top a list of (value, index) pairs,
+        largest first; (None, None, []) for empty input
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    
+    if not isinstance(numbers, (np.ndarray, list, tuple)):
+        top = _top_k_stream(numbers, k)
+    else:
+        top = _top_k_array(np.asarray(numbers, dtype=np.float64).ravel(), k)
+    
+    if not top:
+        return None, None, []
+    return top[0][0], top[0][1], top
+
+class SlidingWindowMax:
+    """
+    Maximum of the last `window` values of a stream, plus the running global maximum.
+    
+    A deque holds (index, value) pairs with strictly decreasing values; a new
+    value first drops every smaller or equal value from the back, because
+    none of them can be a window maximum again. Each value enters and leaves
+    the deque once, so an append is O(1) amortized.
+    """
+    
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.count = 0
+        self.global_max = None
+        self._deque = deque()
+    
+    @property
+    def maximum(self):
+        """Maximum of the current window, or None before the first value."""
+        return self._deque[0][1] if self._deque else None
+    
+    def append(self, value):
+        """Add one value and return the new window maximum."""
+        index = self.count
+        self.count += 1
+        while self._deque and self._deque[-1][1] <= value:
+            self._deque.pop()
+        self._deque.append((index, value))
+        if self._deque[0][0] <= index - self.window:
+            self._deque.popleft()
+        if self.global_max is None or value > self.global_max:
+            self.global_max = value
+        return self._deque[0][1]
+    
+    def extend(self, values):
+        """Add a batch of values and return the window maximum after the last one."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size < self.window:
+            for value in values.tolist():
+                self.append(value)
+            return self.maximum
+        
+        # Only the last `window` values can be in the window afterwards; keep
+        # those larger than everything after them, as the appends would
+        tail = values[-self.window:]
+        later_max = np.append(np.maximum.accumulate(tail[::-1])[::-1][1:], -np.inf)
+        start = self.count + values.size - self.window
+        self._deque = deque((start + int(i), float(tail[i])) for i in np.flatnonzero(tail > later_max))
+        self.count += values.size
+        batch_max = float(values.max())
+        if self.global_max is None or batch_max > self.global_max:
+            self.global_max = batch_max
+        return self.maximum
+
+def telemetry_samples(seed=0):
+    """Endless random-walk telemetry with occasional spikes, for the live stream demo."""
+    rng = np.random.default_rng(seed)
+    level = 0.0
+    while True:
+        walk = level + np.cumsum(rng.normal(0, 1, 256))
+        level = walk[-1]
+        spikes = (rng.random(256) < 0.01) * rng.exponential(15, 256)
+        yield from (walk + spikes).tolist()
+
+# Memoized across Streamlit reruns, keyed on the input text or uploaded file id
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def parse_numbers(numbers_input):
+    """Parse comma-separated numbers; returns (float64 array, invalid tokens)."""
+    return NumberParser.parse_numbers(numbers_input)
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Reading column...")
+def file_column_maximum(file_id, column, _file):
+    _file.seek(0)
+    return ColumnarReader.column_maximum(_file, column)
+
 def main():
     st.title("🔢 List Maximum Finder")
     st.markdown("Find the largest number in a list without using the built-in `max()` function!")
     
     # Create tabs for different input methods
-    tab1, tab2 = st.tabs(["Manual Input", "Predefined Examples"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Manual Input", "Predefined Examples", "Parquet / Arrow File", "Live Stream"])
     
     with tab1:
         st.subheader("Enter Numbers Manually")
@@ -38,19 +186,37 @@ def main():
         )
         
         if numbers_input:
-            try:
-                # Parse the input string into a list of numbers
-                numbers = [float(x.strip()) for x in numbers_input.split(',')]
+            # Parse the input string into a list of numbers, skipping invalid ones
+            values, invalid = parse_numbers(numbers_input)
+            if invalid:
+                st.warning(NumberParser.describe_invalid(invalid))
+            
+            if not len(values):
+                st.error("Please enter valid numbers separated by commas!")
+            else:
+                # Only a prefix is converted to Python floats and shown
+                numbers = values[:PREVIEW_LIMIT].tolist()
                 
                 # Display the input list
                 st.write("**Input List:**", numbers)
+                if len(values) > PREVIEW_LIMIT:
+                    st.caption(f"Showing the first {PREVIEW_LIMIT} of {len(values):,} numbers")
                 
-                # Find maximum
-                result = find_maximum(numbers)
+                # Find maximum; long lists go to the vectorized engine instead of the loop
+                result = find_maximum(numbers) if len(values) <= PREVIEW_LIMIT else reduce_maximum(values)[0]
                 
                 if result is not None:
                     st.success(f"**Maximum Value:** {result}")
                     
+                    # The vectorized engine also gives the position and the largest values
+                    # A slider needs min < max, so a single number has only k = 1
+                    k = st.slider("Show the k largest values:", 1, min(10, len(numbers)), 1) if len(numbers) > 1 else 1
+                    _, index, top = reduce_maximum(values, k)
+                    st.write(f"**Position of the maximum:** #{index + 1} (first occurrence)")
+                    if k > 1:
+                        st.table([{'Rank': rank, 'Value': value, 'Position': position + 1}
+                                  for rank, (value, position) in enumerate(top, 1)])
+                    
                     # Show the process
                     with st.expander("Show Algorithm Steps"):
                         st.write("**Algorithm Process:**")
@@ -59,22 +225,22 @@ def main():
                         st.write("3. If an element is larger, update the maximum")
                         st.write("4. Continue until all elements are checked")
                         
-                        # Demonstrate step by step
+                        # Demonstrate step by step on the previewed numbers, in one write
                         st.write("\n**Step-by-step execution:**")
                         maximum = numbers[0]
-                        st.write(f"Initial maximum: {maximum}")
+                        steps = [f"Initial maximum: {maximum}"]
                         
                         for i, num in enumerate(numbers[1:], 1):
                             if num > maximum:
-                                st.write(f"Step {i}: {num} > {maximum}, update maximum to {num}")
+                                steps.append(f"Step {i}: {num} > {maximum}, update maximum to {num}")
                                 maximum = num
                             else:
-                                st.write(f"Step {i}: {num} ≤ {maximum}, keep maximum as {maximum}")
+                                steps.append(f"Step {i}: {num} ≤ {maximum}, keep maximum as {maximum}")
                         
-                        st.write(f"Final maximum: {maximum}")
-                
-            except ValueError:
-                st.error("Please enter valid numbers separated by commas!")
+                        if len(values) > PREVIEW_LIMIT:
+                            steps.append(f"... {len(values) - PREVIEW_LIMIT:,} more elements compared the same way")
+                        steps.append(f"Final maximum: {result}")
+                        st.write("\n\n".join(steps))
     
     with tab2:
         st.subheader("Try Predefined Examples")
@@ -101,6 +267,70 @@ def main():
             # Show comparison with built-in max (for verification)
             st.info(f"Verification with built-in max(): {max(numbers)}")
     
+    with tab3:
+        st.subheader("Find the Maximum of a Column")
+        st.write("The selected column is streamed batch by batch, so large files are never loaded whole.")
+        
+        uploaded_file = st.file_uploader("Choose a Parquet or Arrow file", type=ColumnarReader.COLUMNAR_TYPES)
+        
+        if uploaded_file is not None:
+            try:
+                numeric_columns = ColumnarReader.numeric_columns(uploaded_file)
+                if numeric_columns:
+                    column = st.selectbox("Select the column:", numeric_columns)
+                    result, position = file_column_maximum(uploaded_file.file_id, column, uploaded_file)
+                    if result is None:
+                        st.warning("The column has no values other than nulls and NaNs.")
+                    else:
+                        st.success(f"**Maximum Value:** {result}")
+                        st.write(f"First found at value #{position + 1} of the column (nulls skipped)")
+                else:
+                    st.error("No numeric columns found in the file.")
+            except Exception as e:
+                st.error(f"Error reading file: {str(e)}")
+    
+    with tab4:
+        st.subheader("Sliding-Window Maximum of a Stream")
+        st.write("Samples are pulled from a telemetry generator and fed to a `SlidingWindowMax`, "
+                 "which is kept between reruns, so each update only processes the new samples.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            window = st.number_input("Window size (samples):", min_value=1, max_value=100_000, value=50)
+        with col2:
+            batch = st.slider("Samples per update:", 1, 1000, 100)
+        
+        # Start a fresh stream when the window changes or on request
+        restart = st.button("Restart Stream")
+        if st.session_state.get("stream_window") != window or restart:
+            st.session_state.stream = SlidingWindowMax(window)
+            st.session_state.stream_source = telemetry_samples()
+            st.session_state.stream_history = deque(maxlen=STREAM_HISTORY)
+            st.session_state.stream_window = window
+        
+        tracker = st.session_state.stream
+        history = st.session_state.stream_history
+        if st.button("Feed Next Samples"):
+            for value in itertools.islice(st.session_state.stream_source, batch):
+                history.append((value, tracker.append(value)))
+        
+        if tracker.count:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Samples Seen", f"{tracker.count:,}")
+            with col2:
+                st.metric(f"Max of Last {window}", f"{tracker.maximum:.2f}")
+            with col3:
+                st.metric("Global Max", f"{tracker.global_max:.2f}")
+            
+            st.line_chart({
+                'sample': [value for value, _ in history],
+                'window max': [window_max for _, window_max in history],
+            })
+            st.caption(f"Last {len(history)} samples")
+        else:
+            st.info("Press **Feed Next Samples** to start the stream.")
+    
     # Algorithm explanation section
     st.markdown("---")
     st.subheader("📚 Algorithm Explanation")
@@ -1,13 +1,81 @@
-from sentence_transformers import SentenceTransformer
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import OrderedDict
+from itertools import islice
+
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from EmbeddingBackend import backend_settings
+from EmbeddingService import get_embedding_service
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'name_formatter')
+# Description words too generic to pick a format on their own
+GENERIC_WORDS = {'name', 'format'}
+
+
+def read_records(path):
+    """Stream records (dicts) from a CSV or JSONL file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+class RecordWriter:
+    """Write records to a CSV or JSONL file (or stdout) as they arrive."""
+    
+    def __init__(self, path=None):
+        self.path = path
+        self.jsonl = bool(path) and path.lower().endswith(('.jsonl', '.ndjson'))
+        self._file = open(path, 'w', newline='', encoding='utf-8') if path else sys.stdout
+        self._csv = None
+    
+    def write(self, record):
+        if self.jsonl:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(self._file, fieldnames=list(record), extrasaction='ignore')
+            self._csv.writeheader()
+        self._csv.writerow(record)
+    
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
 
 
 class NameFormatter:
-    def __init__(self):
-        """Initialize with Hugging Face embedding model."""
-        print("Loading Hugging Face model...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, model_name=MODEL_NAME, cache_dir=None, verbose=True,
+                 context_cache_size=1024, keyword_fast_path=False):
+        """Initialize with Hugging Face embedding model (loaded on first use).
+        
+        Args:
+            context_cache_size: Contexts whose best format is remembered (LRU)
+            keyword_fast_path: Resolve contexts containing keywords unique to
+                one format description without running the model
+        """
+        self.model_name = model_name
+        self.verbose = verbose
+        self.cache_dir = cache_dir or os.environ.get('NAME_FORMATTER_CACHE', DEFAULT_CACHE_DIR)
+        self._embedder = None
+        self.context_cache_size = context_cache_size
+        self.keyword_fast_path = keyword_fast_path
+        self._context_cache = OrderedDict()  # context -> (format name, score)
+        self.stats = {'cache': 0, 'keyword': 0, 'model': 0}
         
         # Define name formats with descriptions
         self.formats = {
@@ -38,14 +106,95 @@ class NameFormatter:
             }
         }
         
-        # Create embeddings for format descriptions
-        self.format_embeddings = self._create_embeddings()
-        print("Name Formatter ready!")
+        # Load (or create and cache) embeddings for format descriptions
+        self.format_embeddings = self._load_embeddings()
+        self.keywords = self._build_keywords()
+        if self.verbose:
+            print("Name Formatter ready!")
+    
+    @property
+    def embedder(self):
+        """Embedding service; the model is only loaded when something needs encoding."""
+        if self._embedder is None:
+            if self.verbose:
+                print("Loading Hugging Face model...")
+            self._embedder = get_embedding_service(self.model_name)
+        return self._embedder
     
     def _create_embeddings(self):
-        """Create embeddings for each format description."""
+        """Create normalized embeddings for each format description."""
+        descriptions = [info['description'] for info in self.formats.values()]
+        embeddings = self.embedder.encode(descriptions).astype(np.float32)
+        return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    
+    def _build_keywords(self):
+        """Map each description word that belongs to exactly one format to that format."""
+        owners = {}
+        for format_name, info in self.formats.items():
+            for word in set(re.findall(r'[a-z]+', info['description'].lower())):
+                owners.setdefault(word, set()).add(format_name)
+        return {word: names.pop() for word, names in owners.items()
+                if len(names) == 1 and word not in GENERIC_WORDS}
+    
+    def _keyword_format(self, context):
+        """Return the format whose keywords alone appear in the context, or None."""
+        matched = {self.keywords[word] for word in re.findall(r'[a-z]+', context.lower())
+                   if word in self.keywords}
+        return matched.pop() if len(matched) == 1 else None
+    
+    def _lookup_context(self, context):
+        """Resolve a context from the LRU cache or keyword fast path, or None."""
+        result = self._context_cache.get(context)
+        if result is not None:
+            self._context_cache.move_to_end(context)
+            self.stats['cache'] += 1
+            return result
+        
+        if self.keyword_fast_path:
+            format_name = self._keyword_format(context)
+            if format_name is not None:
+                self.stats['keyword'] += 1
+                # Keyword matches have no similarity score
+                result = (format_name, None)
+                self._remember_context(context, result)
+                return result
+        return None
+    
+    def _remember_context(self, context, result):
+        self._context_cache[context] = result
+        self._context_cache.move_to_end(context)
+        while len(self._context_cache) > self.context_cache_size:
+            self._context_cache.popitem(last=False)
+    
+    def _embeddings_cache_path(self):
+        """Cache file keyed by model, backend settings and the format descriptions."""
         descriptions = [info['description'] for info in self.formats.values()]
-        return self.model.encode(descriptions)
+        # The ONNX and int8 backends give slightly different embeddings than PyTorch
+        key = json.dumps([self.model_name, *backend_settings(), descriptions]).encode('utf-8')
+        digest = hashlib.sha256(key).hexdigest()[:16]
+        safe_model = self.model_name.replace('/', '_')
+        return os.path.join(self.cache_dir, f"{safe_model}-{digest}.npy")
+    
+    def _load_embeddings(self):
+        """Load format embeddings from disk, encoding and saving them on a miss."""
+        path = self._embeddings_cache_path()
+        try:
+            embeddings = np.load(path)
+            if embeddings.shape[0] == len(self.formats):
+                return embeddings
+        except (OSError, ValueError):
+            pass
+        
+        embeddings = self._create_embeddings()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, embeddings)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache format embeddings: {e}")
+        return embeddings
     
     def parse_name(self, full_name):
         """Parse name into components."""
@@ -71,17 +220,56 @@ class NameFormatter:
     
     def find_best_format(self, context):
         """Find the best format using embedding similarity."""
+        cached = self._lookup_context(context)
+        if cached is not None:
+            return cached
+        
         # Create embedding for user's context
-        context_embedding = self.model.encode([context])
+        context_embedding = np.asarray(self.embedder.submit(context).result(), dtype=np.float32)
+        context_embedding /= max(np.linalg.norm(context_embedding), 1e-12)
         
-        # Calculate similarities
-        similarities = cosine_similarity(context_embedding, self.format_embeddings)[0]
+        # Calculate cosine similarities (format embeddings are normalized)
+        similarities = self.format_embeddings @ context_embedding
         
         # Find best match
         best_idx = np.argmax(similarities)
         format_names = list(self.formats.keys())
         
-        return format_names[best_idx], similarities[best_idx]
+        result = (format_names[best_idx], float(similarities[best_idx]))
+        self.stats['model'] += 1
+        self._remember_context(context, result)
+        return result
+    
+    def find_best_formats(self, contexts):
+        """Find the best format for many contexts with one batched encode.
+        
+        Returns:
+            Dict mapping each distinct context to (format name, similarity),
+            the similarity being None for keyword matches
+        """
+        results = {}
+        unique_contexts = []
+        for context in dict.fromkeys(contexts):
+            cached = self._lookup_context(context)
+            if cached is not None:
+                results[context] = cached
+            else:
+                unique_contexts.append(context)
+        if not unique_contexts:
+            return results
+        embeddings = self.embedder.encode_batch(unique_contexts).astype(np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        
+        # One matrix multiply scores every context against every format
+        similarities = embeddings @ self.format_embeddings.T
+        best = similarities.argmax(axis=1)
+        format_names = list(self.formats.keys())
+        
+        for row, (context, idx) in enumerate(zip(unique_contexts, best.tolist())):
+            results[context] = (format_names[idx], float(similarities[row, idx]))
+            self._remember_context(context, results[context])
+        self.stats['model'] += len(unique_contexts)
+        return results
     
     def format_name(self, full_name, format_type):
         """Format a name using specified format."""
@@ -104,21 +292,78 @@ class NameFormatter:
             }
         return results
     
+    def format_records(self, records, name_field='name', context_field='context', chunk_size=10000):
+        """Smart-format a stream of records, holding one chunk in memory at a time."""
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            best_formats = self.find_best_formats(r.get(context_field) or '' for r in chunk)
+            for record in chunk:
+                best_format, confidence = best_formats[record.get(context_field) or '']
+                yield {
+                    **record,
+                    'formatted_name': self.format_name(record.get(name_field) or '', best_format),
+                    'format_used': best_format,
+                    'matched_by': 'model' if confidence is not None else 'keyword',
+                    'confidence': round(confidence, 4) if confidence is not None else None
+                }
+    
+    def format_file(self, input_path, output_path=None, name_field='name', context_field='context',
+                    chunk_size=10000):
+        """Smart-format every record of a CSV/JSONL file into another file.
+        
+        Returns:
+            Number of records written
+        """
+        count = 0
+        with RecordWriter(output_path) as writer:
+            records = read_records(input_path)
+            for record in self.format_records(records, name_field, context_field, chunk_size):
+                writer.write(record)
+                count += 1
+        return count
+    
     def smart_format(self, full_name, context):
-        """Automatically choose best format based on context."""
+        """Automatically choose best format based on context.
+        
+        The confidence is None when a format keyword decided the format.
+        """
         best_format, confidence = self.find_best_format(context)
         formatted_name = self.format_name(full_name, best_format)
         
         return {
             'formatted_name': formatted_name,
             'format_used': best_format,
+            'matched_by': 'model' if confidence is not None else 'keyword',
             'confidence': confidence
         }
 
 
 def main():
-    """Simple demonstration of the Name Formatter."""
-    formatter = NameFormatter()
+    """Simple demonstration of the Name Formatter, or bulk formatting of a file."""
+    parser = argparse.ArgumentParser(description="Format names based on context using embeddings.")
+    parser.add_argument("input", nargs="?", help="CSV or JSONL file of records to format in bulk")
+    parser.add_argument("output", nargs="?", help="CSV or JSONL output file (default: stdout)")
+    parser.add_argument("--name-field", default="name", help="field holding the full name")
+    parser.add_argument("--context-field", default="context", help="field holding the context")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="records encoded per batch")
+    parser.add_argument("--keywords", action="store_true",
+                        help="resolve contexts with format keywords without the model")
+    args = parser.parse_args()
+    
+    if args.input:
+        # Stay quiet so results can be streamed to stdout
+        formatter = NameFormatter(verbose=False, keyword_fast_path=args.keywords)
+        count = formatter.format_file(args.input, args.output, args.name_field,
+                                      args.context_field, args.chunk_size)
+        print(f"Formatted {count} records "
+              f"(cache: {formatter.stats['cache']}, keyword: {formatter.stats['keyword']}, "
+              f"model: {formatter.stats['model']})", file=sys.stderr)
+        return
+    
+    formatter = NameFormatter(keyword_fast_path=args.keywords)
     
     print("\n=== Simple Name Formatter with Hugging Face Embeddings ===\n")
     
@@ -147,7 +392,10 @@ def main():
         result = formatter.smart_format(test_name, context)
         print(f"Context: {context}")
         print(f"Best format: {result['format_used']} -> {result['formatted_name']}")
-        print(f"Confidence: {result['confidence']:.3f}\n")
+        if result['confidence'] is None:
+            print("Confidence: n/a (keyword match)\n")
+        else:
+            print(f"Confidence: {result['confidence']:.3f}\n")
     
     # Interactive mode
     print("=== Try It Yourself ===")
@@ -0,0 +1,56 @@
+"""
+NumberParser.py - Bulk parsing of pasted numbers into a float64 array
+
+Numbers may be separated by commas, spaces or new lines. Well-formed text
+is parsed by NumPy's C parser in a single call, without creating a Python
+object per number. If any token is not a number, one scanning pass keeps
+the valid numbers and records where the invalid tokens are, so a single
+typo does not reject the whole input. "nan" is reported as invalid too:
+it is not a value that can be counted, compared or averaged.
+"""
+import re
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'[^,\s]+')
+
+
+def parse_numbers(text):
+    """
+    Parse numbers separated by commas, spaces or new lines.
+
+    Returns:
+        (values, invalid): a float64 array of the numbers in input order, and
+        a list of (token number, character offset, token) for every token
+        that is not a number, token numbers counting from 0
+    """
+    # A space in the separator matches any run of whitespace, new lines included
+    normalized = text.replace(',', ' ')
+    if not normalized.strip():
+        return np.empty(0), []
+    try:
+        values = np.fromstring(normalized, sep=' ')
+        if not np.isnan(values).any():
+            return values, []
+    except ValueError:
+        pass
+
+    values = []
+    invalid = []
+    for index, match in enumerate(TOKEN_PATTERN.finditer(text)):
+        try:
+            value = float(match.group())
+        except ValueError:
+            value = float('nan')
+        if value != value:
+            invalid.append((index, match.start(), match.group()))
+        else:
+            values.append(value)
+    return np.array(values, dtype=np.float64), invalid
+
+
+def describe_invalid(invalid, limit=5):
+    """One-line description of the first invalid tokens, for error messages."""
+    shown = ", ".join(f"'{token}' (#{index + 1}, char {offset + 1})" for index, offset, token in invalid[:limit])
+    more = f" and {len(invalid) - limit} more" if len(invalid) > limit else ""
+    return f"Skipped {len(invalid)} invalid value{'s' if len(invalid) != 1 else ''}: {shown}{more}"
@@ -0,0 +1,263 @@
+"""
+SelfRagMemory.py - Embedding-indexed memory of computed (input, output) pairs
+
+Lookups go through three tiers, cheapest first:
+
+    exact     normalized-text hash lookup, no embedding needed
+    semantic  vector search over this session's memory
+    shared    vector search over the on-disk store shared by all sessions
+
+The session memory can be bounded by entry count and approximate size in
+bytes, with LRU or LFU eviction and a time-to-live per entry. Evicted entries
+are removed from the vector index and exact tier; the shared store keeps them.
+"""
+import time
+from collections import OrderedDict
+
+from VectorIndex import VectorIndex
+
+TIERS = ('exact', 'semantic', 'shared')
+ENTRY_OVERHEAD_BYTES = 200  # dict slots, tuple and index bookkeeping per entry
+
+
+def normalize_text(text):
+    """Collapse whitespace and case so trivially different repeats share a key."""
+    return ' '.join(text.split()).casefold()
+
+
+class _LRUPolicy:
+    """Least recently used first."""
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def add(self, key):
+        self._order[key] = None
+
+    def touch(self, key):
+        self._order.move_to_end(key)
+
+    def remove(self, key):
+        del self._order[key]
+
+    def victim(self):
+        return next(iter(self._order))
+
+
+class _LFUPolicy:
+    """Least frequently used first, least recently used among equals."""
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}  # count -> OrderedDict of keys
+        # Non-empty counts as a doubly linked list in increasing order, so the
+        # lowest count is always at the head and no operation scans buckets
+        self._next = {}
+        self._prev = {}
+        self._head = None
+
+    def _link_after(self, count, previous):
+        """Insert an empty bucket for count after previous (None for the head)."""
+        following = self._head if previous is None else self._next[previous]
+        self._buckets[count] = OrderedDict()
+        self._prev[count] = previous
+        self._next[count] = following
+        if previous is None:
+            self._head = count
+        else:
+            self._next[previous] = count
+        if following is not None:
+            self._prev[following] = count
+
+    def _unlink_bucket(self, count):
+        previous, following = self._prev.pop(count), self._next.pop(count)
+        del self._buckets[count]
+        if previous is None:
+            self._head = following
+        else:
+            self._next[previous] = following
+        if following is not None:
+            self._prev[following] = previous
+
+    def add(self, key):
+        self._counts[key] = 1
+        if 1 not in self._buckets:
+            self._link_after(1, None)
+        self._buckets[1][key] = None
+
+    def _unlink(self, key):
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            self._unlink_bucket(count)
+        return count
+
+    def touch(self, key):
+        count = self._counts[key]
+        if count + 1 not in self._buckets:
+            self._link_after(count + 1, count)
+        self._unlink(key)
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def remove(self, key):
+        self._unlink(key)
+        del self._counts[key]
+
+    def victim(self):
+        return next(iter(self._buckets[self._head]))
+
+
+EVICTION_POLICIES = {'lru': _LRUPolicy, 'lfu': _LFUPolicy}
+
+
+class SelfRagMemory:
+    """Remember computed results and retrieve them for similar inputs."""
+
+    def __init__(self, index=None, store=None, max_entries=None, max_bytes=None,
+                 policy='lru', ttl=None, clock=time.monotonic):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.index = index if index is not None else VectorIndex()
+        self.store = store
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = {}  # index id -> (input, output)
+        self.exact = {}  # normalized input -> index id
+        self.nbytes = 0
+        self._policy = EVICTION_POLICIES[policy]()
+        self._sizes = {}  # index id -> estimated bytes
+        self._expiry = OrderedDict()  # index id -> expiry time, in insertion order
+        self.stats = {tier: {'hits': 0, 'misses': 0} for tier in TIERS}
+        self.stats['evictions'] = {'capacity': 0, 'bytes': 0, 'expired': 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        """Iterate over stored (input, output) pairs, oldest first."""
+        return iter(self.entries.values())
+
+    def _record(self, tier, hit):
+        self.stats[tier]['hits' if hit else 'misses'] += 1
+
+    def _evict(self, entry_id, reason):
+        sentence, _ = self.entries.pop(entry_id)
+        self.index.remove(entry_id)
+        key = normalize_text(sentence)
+        if self.exact.get(key) == entry_id:
+            del self.exact[key]
+        self.nbytes -= self._sizes.pop(entry_id)
+        self._expiry.pop(entry_id, None)
+        self._policy.remove(entry_id)
+        self.stats['evictions'][reason] += 1
+
+    def expire(self):
+        """Evict entries whose time-to-live has passed."""
+        # A single TTL means insertion order is also expiry order
+        now = self.clock()
+        while self._expiry:
+            entry_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            self._evict(entry_id, 'expired')
+
+    def _make_room(self, size):
+        """Evict until one more entry of ``size`` bytes fits; False if it never can."""
+        if self.max_entries is not None and self.max_entries < 1:
+            return False
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        while self.max_entries is not None and len(self.entries) >= self.max_entries:
+            self._evict(self._policy.victim(), 'capacity')
+        while self.max_bytes is not None and self.nbytes + size > self.max_bytes:
+            self._evict(self._policy.victim(), 'bytes')
+        return True
+
+    def get_exact(self, sentence):
+        """Return the output stored for a normalized repeat of ``sentence``, or None."""
+        self.expire()
+        entry_id = self.exact.get(normalize_text(sentence))
+        if entry_id is not None:
+            self._policy.touch(entry_id)
+            self._record('exact', True)
+            return self.entries[entry_id][1]
+
+        shared = self.store.get(sentence) if self.store is not None else None
+        if shared is not None:
+            _, stored_input, stored_output, vector = shared
+            self._add_local(vector, stored_input, stored_output)
+            self._record('exact', True)
+            return stored_output
+
+        self._record('exact', False)
+        return None
+
+    def _search_ids(self, vector, k, threshold):
+        self.expire()
+        return self.index.search(vector, k=k, threshold=threshold)
+
+    def search(self, vector, k=1, threshold=None):
+        """Return up to k (input, output, score) matches for an embedding."""
+        return [
+            (*self.entries[entry_id], score)
+            for entry_id, score in self._search_ids(vector, k, threshold)
+        ]
+
+    def lookup(self, vector, threshold=0.9):
+        """
+        Find a stored output for an embedding, session memory first.
+
+        Returns:
+            (output, tier) for the best match above threshold, or (None, None)
+        """
+        matches = self._search_ids(vector, 1, threshold)
+        self._record('semantic', bool(matches))
+        if matches:
+            entry_id = matches[0][0]
+            self._policy.touch(entry_id)
+            return self.entries[entry_id][1], 'semantic'
+
+        if self.store is None:
+            return None, None
+        shared = self.store.search(vector, k=1, threshold=threshold)
+        self._record('shared', bool(shared))
+        if not shared:
+            return None, None
+        _, stored_input, stored_output, _ = shared[0]
+        self._add_local(vector, stored_input, stored_output)
+        return stored_output, 'shared'
+
+    def _add_local(self, vector, sentence, output):
+        self.expire()
+        # Added to the index first so its vector size is known, but entered
+        # into the policy only once there is room
+        entry_id = self.index.add(vector)
+        size = (self.index.bytes_per_vector + len(sentence.encode('utf-8'))
+                + len(output.encode('utf-8')) + ENTRY_OVERHEAD_BYTES)
+        if not self._make_room(size):
+            self.index.remove(entry_id)
+            return None
+        self.entries[entry_id] = (sentence, output)
+        self.exact[normalize_text(sentence)] = entry_id
+        self._sizes[entry_id] = size
+        self.nbytes += size
+        if self.ttl is not None:
+            self._expiry[entry_id] = self.clock() + self.ttl
+        self._policy.add(entry_id)
+        return entry_id
+
+    def add(self, vector, sentence, output):
+        """
+        Store a computed result under its embedding, writing through to the store.
+
+        Returns the session id, or None if the entry alone exceeds the limits
+        and is only written to the store.
+        """
+        entry_id = self._add_local(vector, sentence, output)
+        if self.store is not None:
+            self.store.append(vector, sentence, output)
+        return entry_id
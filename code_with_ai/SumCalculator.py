@@ -4,6 +4,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 import time
 import math
+from fractions import Fraction
+from functools import lru_cache
+
+CACHE_ENTRIES = 64  # results kept per cached function across reruns, least recently used evicted
+MAX_N = 10 ** 100  # largest n accepted; the closed forms stay exact integers
+LOOP_LIMIT = 10_000_000  # loop methods are benchmarks only and never run beyond this n
+MAX_POWER = 200  # largest k offered for sums of k-th powers
+MAX_CHART_POINTS = 2000  # points sent to the browser for the running-sum chart
+MAX_DIGITS = 1000  # longest integer accepted as input, written out or as base^exponent
+DISPLAY_DIGITS = 400  # longer results show only their leading and trailing digits
 
 def sum_using_for_loop(n):
     """Calculate sum using for loop."""
@@ -31,6 +41,118 @@ def sum_using_recursion(n):
         return n
     return n + sum_using_recursion(n - 1)
 
+def range_count(start, stop, step=1):
+    """Number of terms in range(start, stop, step), for integers of any size."""
+    if step == 0:
+        raise ValueError("step must not be zero")
+    if step > 0:
+        return max(0, (stop - start + step - 1) // step)
+    return max(0, (start - stop - step - 1) // -step)
+
+def range_sum(start, stop, step=1):
+    """Sum of range(start, stop, step) in O(1): count * (first + last) / 2."""
+    count = range_count(start, stop, step)
+    return count * (2 * start + (count - 1) * step) // 2
+
+_BERNOULLI = [Fraction(1)]  # B_0, B_1, ... (B_1 = -1/2), extended on demand
+
+def bernoulli(m):
+    """Bernoulli number B_m, from sum(C(j+1, i) * B_i for i <= j) = 0."""
+    while len(_BERNOULLI) <= m:
+        j = len(_BERNOULLI)
+        if j > 1 and j % 2:
+            _BERNOULLI.append(Fraction(0))  # odd Bernoulli numbers after B_1 vanish
+        else:
+            _BERNOULLI.append(-sum(math.comb(j + 1, i) * _BERNOULLI[i] for i in range(j)) / (j + 1))
+    return _BERNOULLI[m]
+
+@lru_cache(maxsize=CACHE_ENTRIES)
+def faulhaber_coefficients(k):
+    """
+    Coefficients of 1^k + 2^k + ... + n^k as a polynomial in n (Faulhaber's formula).
+    
+    Returns:
+        Tuple of (exponent, Fraction coefficient) pairs, exponents k+1 down to 1
+    """
+    coefficients = []
+    for j in range(k + 1):
+        b = -bernoulli(j) if j == 1 else bernoulli(j)  # the sum from 1 to n uses B_1 = +1/2
+        if b:
+            coefficients.append((k + 1 - j, math.comb(k + 1, j) * b / (k + 1)))
+    return tuple(coefficients)
+
+def power_sum(n, k=1):
+    """Exact 1^k + 2^k + ... + n^k in O(k) big-integer operations."""
+    if n < 1:
+        return 0
+    total = sum(coefficient * n ** exponent for exponent, coefficient in faulhaber_coefficients(k))
+    return int(total)
+
+def modular_power_sum(n, k, modulus):
+    """
+    (1^k + 2^k + ... + n^k) mod modulus without forming the full sum.
+    
+    Scaling Faulhaber's polynomial by the common denominator D gives integer
+    coefficients, so every power of n can be reduced modulo modulus * D.
+    """
+    if n < 1:
+        return 0
+    coefficients = faulhaber_coefficients(k)
+    denominator = math.lcm(*(coefficient.denominator for _, coefficient in coefficients))
+    scaled_modulus = modulus * denominator
+    total = sum(
+        coefficient.numerator * (denominator // coefficient.denominator) * pow(n, exponent, scaled_modulus)
+        for exponent, coefficient in coefficients
+    ) % scaled_modulus
+    return total // denominator
+
+def parse_big_int(text):
+    """
+    Parse an integer such as 1000000, 1_000_000, 1,000,000, 10^100 or 10**100.
+    
+    Raises ValueError for text that is not a whole number and OverflowError
+    for numbers of more than MAX_DIGITS digits, checked before computing them.
+    """
+    text = text.strip().replace('_', '').replace(',', '').replace(' ', '').replace('**', '^')
+    if len(text) > MAX_DIGITS:
+        raise OverflowError(f"numbers may have at most {MAX_DIGITS:,} digits")
+    if '^' in text:
+        base, exponent = text.split('^', 1)
+        base, exponent = int(base), int(exponent)
+        if exponent < 0:
+            raise ValueError("the exponent must not be negative")
+        # |base|^exponent has about exponent * log10|base| digits
+        if abs(base) > 1 and (exponent > 4 * MAX_DIGITS or exponent * math.log10(abs(base)) > MAX_DIGITS):
+            raise OverflowError(f"numbers may have at most {MAX_DIGITS:,} digits")
+        return base ** exponent
+    return int(text)
+
+def digit_count(value):
+    """Number of decimal digits of an integer, without converting it to a string."""
+    value = abs(value)
+    if value < 10:
+        return 1
+    digits = int(value.bit_length() * math.log10(2))
+    # The estimate from the bit length is at most one short
+    return digits + 1 if value >= 10 ** digits else digits
+
+def format_big_int(value, max_digits=DISPLAY_DIGITS):
+    """
+    Write out an integer, or its leading and trailing digits and digit count
+    when it has more than max_digits digits.
+    
+    Python refuses to convert integers of more than 4300 digits to strings,
+    and a sum of powers for n = 10^100 can have over 20000.
+    """
+    digits = digit_count(value)
+    if digits <= max_digits:
+        return str(value)
+    shown = max_digits // 2
+    sign = '-' if value < 0 else ''
+    leading = abs(value) // 10 ** (digits - shown)
+    trailing = abs(value) % 10 ** shown
+    return f"{sign}{leading}...{trailing:0{shown}d} ({digits:,} digits)"
+
 def measure_execution_time(func, n):
     """Measure execution time of a function."""
     start_time = time.time()
@@ -38,6 +160,96 @@ def measure_execution_time(func, n):
     end_time = time.time()
     return result, (end_time - start_time) * 1000  # Convert to milliseconds
 
+METHODS = {
+    "For Loop": sum_using_for_loop,
+    "While Loop": sum_using_while_loop,
+    "Mathematical Formula": sum_using_formula,
+    "Recursion": sum_using_recursion,
+}
+
+# Streamlit reruns the script on every widget change; results and figures are
+# memoized on their inputs so toggling a display option does not recompute.
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def calculate(method, n):
+    """Run one method and return (result, milliseconds), timed on first call only."""
+    return measure_execution_time(METHODS[method], n)
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def build_performance_chart(methods, times):
+    perf_df = pd.DataFrame({
+        'Method': list(methods),
+        'Execution Time (ms)': list(times)
+    })
+    
+    # Bar chart for execution times
+    fig_bar = px.bar(
+        perf_df,
+        x='Method',
+        y='Execution Time (ms)',
+        title='Execution Time Comparison',
+        color='Method'
+    )
+    return perf_df, fig_bar
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def build_cumulative_chart(n):
+    """
+    Line chart of the running sum 1 + 2 + ... + i for i up to n.
+    
+    At most MAX_CHART_POINTS evenly spaced values of i are plotted;
+    the running sum is smooth, so these keep its shape, and its closed form
+    means only the plotted points are computed.
+    
+    Returns:
+        (figure, number of points plotted)
+    """
+    # Exact integer positions, so n may be far beyond the float and int64 ranges
+    points = min(n, MAX_CHART_POINTS)
+    numbers = sorted({1 + (n - 1) * i // max(points - 1, 1) for i in range(points)})
+    cumulative_sums = [float(sum_using_formula(number)) for number in numbers]
+    numbers = [float(number) for number in numbers]
+    
+    fig_line = go.Figure()
+    fig_line.add_trace(go.Scatter(
+        x=numbers,
+        y=cumulative_sums,
+        mode='lines+markers' if len(numbers) <= 100 else 'lines',
+        name='Cumulative Sum',
+        line=dict(color='blue', width=2)
+    ))
+    
+    fig_line.update_layout(
+        title='Cumulative Sum from 1 to n',
+        xaxis_title='Number',
+        yaxis_title='Cumulative Sum',
+        showlegend=True
+    )
+    return fig_line, len(numbers)
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def build_growth_chart(n):
+    """Line chart of n(n+1)/2 for n up to 100."""
+    n_values = list(range(1, min(n + 1, 101)))
+    sum_values = [sum_using_formula(i) for i in n_values]
+    
+    fig_growth = go.Figure()
+    fig_growth.add_trace(go.Scatter(
+        x=n_values,
+        y=sum_values,
+        mode='lines+markers',
+        name='Sum = n(n+1)/2',
+        line=dict(color='red', width=2)
+    ))
+    
+    fig_growth.update_layout(
+        title='Sum Growth Pattern (Quadratic Growth)',
+        xaxis_title='n',
+        yaxis_title='Sum (1 to n)',
+        showlegend=True
+    )
+    return fig_growth
+
 def main():
     st.set_page_config(
         page_title="Sum Calculator",
@@ -51,14 +263,18 @@ def main():
     # Sidebar for input
     st.sidebar.header("Input Parameters")
     
-    # Number input
-    n = st.sidebar.number_input(
-        "Enter the value of n:",
-        min_value=1,
-        max_value=10000,
-        value=100,
-        step=1
-    )
+    # Text input, since n may have up to 100 digits
+    n_text = st.sidebar.text_input("Enter the value of n (up to 10^100):", value="100")
+    try:
+        n = parse_big_int(n_text)
+    except ValueError:
+        st.sidebar.error("Please enter a whole number, e.g. 1000000 or 10^100.")
+        return
+    except OverflowError:
+        n = None
+    if n is None or not 1 <= n <= MAX_N:
+        st.sidebar.error("n must be between 1 and 10^100.")
+        return
     
     # Method selection
     methods = st.sidebar.multiselect(
@@ -86,25 +302,29 @@ def main():
     
     # Calculate using selected methods
     if "For Loop" in methods:
-        if n <= 1000 or st.sidebar.button("Calculate with For Loop (may be slow for large n)"):
-            result, exec_time = measure_execution_time(sum_using_for_loop, n)
+        if n > LOOP_LIMIT:
+            st.warning(f"For Loop skipped for n > {LOOP_LIMIT:,}; it is kept as a benchmark only.")
+        elif n <= 1000 or st.sidebar.button("Calculate with For Loop (may be slow for large n)"):
+            result, exec_time = calculate("For Loop", n)
             results["For Loop"] = result
             execution_times["For Loop"] = exec_time
     
     if "While Loop" in methods:
-        if n <= 1000 or st.sidebar.button("Calculate with While Loop (may be slow for large n)"):
-            result, exec_time = measure_execution_time(sum_using_while_loop, n)
+        if n > LOOP_LIMIT:
+            st.warning(f"While Loop skipped for n > {LOOP_LIMIT:,}; it is kept as a benchmark only.")
+        elif n <= 1000 or st.sidebar.button("Calculate with While Loop (may be slow for large n)"):
+            result, exec_time = calculate("While Loop", n)
             results["While Loop"] = result
             execution_times["While Loop"] = exec_time
     
     if "Mathematical Formula" in methods:
-        result, exec_time = measure_execution_time(sum_using_formula, n)
+        result, exec_time = calculate("Mathematical Formula", n)
         results["Mathematical Formula"] = result
         execution_times["Mathematical Formula"] = exec_time
     
     if "Recursion" in methods:
         if n <= 100:
-            result, exec_time = measure_execution_time(sum_using_recursion, n)
+            result, exec_time = calculate("Recursion", n)
             results["Recursion"] = result
             execution_times["Recursion"] = exec_time
         else:
@@ -138,20 +358,7 @@ def main():
         if show_performance and len(results) > 1:
             st.subheader("Performance Comparison")
             
-            # Create performance dataframe
-            perf_df = pd.DataFrame({
-                'Method': list(execution_times.keys()),
-                'Execution Time (ms)': list(execution_times.values())
-            })
-            
-            # Bar chart for execution times
-            fig_bar = px.bar(
-                perf_df,
-                x='Method',
-                y='Execution Time (ms)',
-                title='Execution Time Comparison',
-                color='Method'
-            )
+            perf_df, fig_bar = build_performance_chart(tuple(execution_times), tuple(execution_times.values()))
             st.plotly_chart(fig_bar, use_container_width=True)
             
             # Performance table
@@ -183,60 +390,67 @@ def main():
     if results:
         st.subheader("Visualization")
         
-        # Create sequence visualization for small n
-        if n <= 100:
-            # Line chart showing cumulative sum
-            numbers = list(range(1, n + 1))
-            cumulative_sums = []
-            running_sum = 0
-            
-            for num in numbers:
-                running_sum += num
-                cumulative_sums.append(running_sum)
-            
-            fig_line = go.Figure()
-            fig_line.add_trace(go.Scatter(
-                x=numbers,
-                y=cumulative_sums,
-                mode='lines+markers',
-                name='Cumulative Sum',
-                line=dict(color='blue', width=2)
-            ))
-            
-            fig_line.update_layout(
-                title='Cumulative Sum from 1 to n',
-                xaxis_title='Number',
-                yaxis_title='Cumulative Sum',
-                showlegend=True
-            )
-            
-            st.plotly_chart(fig_line, use_container_width=True)
+        # Line chart showing cumulative sum, sampled to a bounded number of points
+        fig_line, shown = build_cumulative_chart(n)
+        st.plotly_chart(fig_line, use_container_width=True)
+        if shown < n:
+            st.caption(f"Showing {shown:,} of {n:,} points ({shown / n:.2%}, evenly sampled)")
         
         # Comparison with different values of n
         st.subheader("Sum Growth Pattern")
         
-        # Generate data for different values of n
-        n_values = list(range(1, min(n + 1, 101)))
-        sum_values = [sum_using_formula(i) for i in n_values]
-        
-        fig_growth = go.Figure()
-        fig_growth.add_trace(go.Scatter(
-            x=n_values,
-            y=sum_values,
-            mode='lines+markers',
-            name='Sum = n(n+1)/2',
-            line=dict(color='red', width=2)
-        ))
-        
-        fig_growth.update_layout(
-            title='Sum Growth Pattern (Quadratic Growth)',
-            xaxis_title='n',
-            yaxis_title='Sum (1 to n)',
-            showlegend=True
-        )
-        
+        fig_growth = build_growth_chart(n)
         st.plotly_chart(fig_growth, use_container_width=True)
     
+    # Closed-form engine for general series
+    st.subheader("Closed-Form Series Engine")
+    st.write("Exact integer results in O(1) or O(k) steps, for n up to 10^100.")
+    
+    tab_range, tab_power, tab_modular = st.tabs(["Arithmetic Range", "Sum of Powers", "Modular Sum"])
+    
+    with tab_range:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start_text = st.text_input("Start:", value="1")
+        with col2:
+            stop_text = st.text_input("Stop (exclusive):", value=str(n + 1))
+        with col3:
+            step_text = st.text_input("Step:", value="1")
+        try:
+            start, stop, step = (parse_big_int(t) for t in (start_text, stop_text, step_text))
+            st.write(f"**Terms:** {range_count(start, stop, step):,}")
+            st.code(f"sum(range({start}, {stop}, {step})) = {format_big_int(range_sum(start, stop, step))}")
+        except ValueError:
+            st.error("Start, stop and step must be whole numbers, and step must not be zero.")
+        except OverflowError as e:
+            st.error(f"Start, stop and step are too large: {e}.")
+    
+    with tab_power:
+        k = st.number_input("Power k:", min_value=0, max_value=MAX_POWER, value=2, step=1)
+        result, exec_time = measure_execution_time(lambda n: power_sum(n, k), n)
+        st.latex(f"\\sum_{{i=1}}^{{n}} i^{{{k}}} = \\frac{{1}}{{{k + 1}}}\\sum_{{j=0}}^{{{k}}} "
+                 f"\\binom{{{k + 1}}}{{j}} B_j n^{{{k + 1}-j}}")
+        st.code(f"1^{k} + 2^{k} + ... + n^{k} = {format_big_int(result)}")
+        st.caption(f"Computed with Faulhaber's formula in {exec_time:.3f} ms")
+    
+    with tab_modular:
+        col1, col2 = st.columns(2)
+        with col1:
+            modulus_text = st.text_input("Modulus m:", value="1000000007")
+        with col2:
+            modular_k = st.number_input("Power k:", min_value=0, max_value=MAX_POWER, value=1, step=1,
+                                        key="modular_k")
+        try:
+            modulus = parse_big_int(modulus_text)
+            if modulus < 1:
+                raise ValueError
+            st.code(f"(1^{modular_k} + ... + n^{modular_k}) mod {format_big_int(modulus)} = "
+                    f"{format_big_int(modular_power_sum(n, modular_k, modulus))}")
+        except ValueError:
+            st.error("The modulus must be a positive whole number.")
+        except OverflowError as e:
+            st.error(f"The modulus is too large: {e}.")
+    
     # Educational section
     st.subheader("About the Methods")
     
@@ -0,0 +1,386 @@
+"""
+VectorIndex.py - Cosine-similarity vector index for embedding memories
+"""
+import argparse
+import time
+
+import numpy as np
+
+QUANTIZATIONS = ('float32', 'int8', 'binary')
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _POPCOUNT_TABLE[values]
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, best first."""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+
+class _VectorBlock:
+    """
+    Contiguous, growable matrix of normalized vectors and their ids.
+
+    Vectors are kept as float32, as int8 codes with one scale per vector, or
+    as packed sign bits, depending on ``quantization``.
+    """
+
+    SCORE_CHUNK_ROWS = 16384
+
+    def __init__(self, dim, capacity, growth_factor, quantization='float32'):
+        self.dim = dim
+        self.growth_factor = growth_factor
+        self.quantization = quantization
+        capacity = max(capacity, 1)
+        if quantization == 'float32':
+            self.codes = np.empty((capacity, dim), dtype=np.float32)
+        elif quantization == 'int8':
+            self.codes = np.empty((capacity, dim), dtype=np.int8)
+        else:
+            self.codes = np.empty((capacity, (dim + 7) // 8), dtype=np.uint8)
+        self.scales = np.empty(capacity, dtype=np.float32) if quantization == 'int8' else None
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    @property
+    def nbytes(self):
+        scales = self.scales.nbytes if self.scales is not None else 0
+        return self.codes.nbytes + self.ids.nbytes + scales
+
+    def _grow(self):
+        """Reallocate storage in amortized chunks."""
+        capacity = max(int(len(self.ids) * self.growth_factor), len(self.ids) + 1)
+        codes = np.empty((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+        codes[:self.size] = self.codes[:self.size]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self.size] = self.ids[:self.size]
+        if self.scales is not None:
+            scales = np.empty(capacity, dtype=np.float32)
+            scales[:self.size] = self.scales[:self.size]
+            self.scales = scales
+        self.codes, self.ids = codes, ids
+
+    def append(self, vector_id, vector):
+        """Store a normalized vector and return its row."""
+        if self.size == len(self.ids):
+            self._grow()
+        row = self.size
+        if self.quantization == 'float32':
+            self.codes[row] = vector
+        elif self.quantization == 'int8':
+            scale = max(float(np.abs(vector).max()), 1e-12) / 127
+            self.codes[row] = np.round(vector / scale)
+            self.scales[row] = scale
+        else:
+            self.codes[row] = np.packbits(vector > 0)
+        self.ids[row] = vector_id
+        self.size += 1
+        return row
+
+    def remove_row(self, row):
+        """Remove a row by moving the last row into its place.
+
+        Returns the id of the vector that moved into ``row``, or None.
+        """
+        last = self.size - 1
+        moved_id = None
+        if row != last:
+            self.codes[row] = self.codes[last]
+            self.ids[row] = self.ids[last]
+            if self.scales is not None:
+                self.scales[row] = self.scales[last]
+            moved_id = int(self.ids[row])
+        self.size = last
+        return moved_id
+
+    def decode(self, rows=slice(None)):
+        """Return (approximate) float32 vectors for the given rows."""
+        codes = self.codes[:self.size][rows]
+        if self.quantization == 'float32':
+            return codes.copy()
+        if self.quantization == 'int8':
+            return codes.astype(np.float32) * self.scales[:self.size][rows, None]
+        signs = np.unpackbits(codes, axis=-1, count=self.dim).astype(np.float32) * 2 - 1
+        return signs / np.sqrt(self.dim)
+
+    def _scores(self, query):
+        """Cosine (float32) or asymmetric int8 scores against every row."""
+        if self.quantization == 'float32':
+            return self.codes[:self.size] @ query
+        scores = np.empty(self.size, dtype=np.float32)
+        for start in range(0, self.size, self.SCORE_CHUNK_ROWS):
+            stop = min(start + self.SCORE_CHUNK_ROWS, self.size)
+            scores[start:stop] = (self.codes[start:stop].astype(np.float32) @ query) * self.scales[start:stop]
+        return scores
+
+    def search(self, query, query_bits, k, rescore_k):
+        """Return (ids, scores) of this block's best candidates."""
+        if self.quantization != 'binary':
+            scores = self._scores(query)
+            top = _top_k(scores, k)
+            return self.ids[top], scores[top]
+
+        # Hamming prefilter on the packed bits, then rescore the survivors
+        # with the float query against their sign vectors
+        distances = _popcount(np.bitwise_xor(self.codes[:self.size], query_bits)).sum(axis=1, dtype=np.int32)
+        candidates = _top_k(-distances, rescore_k)
+        signs = np.unpackbits(self.codes[candidates], axis=1, count=self.dim).astype(np.float32) * 2 - 1
+        scores = (signs @ query) / max(float(np.abs(query).sum()), 1e-12)
+        top = _top_k(scores, k)
+        return self.ids[candidates[top]], scores[top]
+
+
+class VectorIndex:
+    """
+    Normalized float32 vector index with exact or IVF search.
+
+    In ``flat`` mode every vector lives in one contiguous matrix and a search
+    is a single matrix-vector product. In ``ivf`` mode vectors are clustered
+    into ``nlist`` inverted lists once ``train_size`` vectors are stored, and a
+    search only scans the ``nprobe`` lists closest to the query.
+
+    ``quantization`` trades accuracy for memory: ``int8`` keeps one byte per
+    dimension plus a scale (about 4x smaller) and scores the float query
+    against the codes; ``binary`` keeps one bit per dimension (32x smaller),
+    preselects ``rescore_factor * k`` candidates by Hamming distance and
+    rescores them with the float query. Binary scores are normalized so an
+    identical vector scores 1.0, but sit below the true cosine otherwise.
+    """
+
+    def __init__(self, dim=None, mode='flat', initial_capacity=1024, growth_factor=2.0,
+                 nlist=64, nprobe=8, train_size=None, seed=0,
+                 quantization='float32', rescore_factor=10):
+        if mode not in ('flat', 'ivf'):
+            raise ValueError(f"Unknown index mode: {mode}")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.dim = dim
+        self.mode = mode
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.initial_capacity = initial_capacity
+        self.growth_factor = growth_factor
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or nlist * 40
+        self.seed = seed
+
+        self._blocks = []
+        self._centroids = None  # set once the IVF lists are trained
+        self._locations = {}  # id -> (block number, row)
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, vector_id):
+        return vector_id in self._locations
+
+    @property
+    def nbytes(self):
+        """Bytes held by the stored vectors and ids."""
+        centroids = self._centroids.nbytes if self._centroids is not None else 0
+        return sum(block.nbytes for block in self._blocks) + centroids
+
+    @property
+    def bytes_per_vector(self):
+        """Bytes one stored vector occupies, excluding spare capacity."""
+        if self.dim is None:
+            return 0
+        return {'float32': self.dim * 4, 'int8': self.dim + 4, 'binary': (self.dim + 7) // 8}[self.quantization]
+
+    @property
+    def is_trained(self):
+        """True when IVF lists are in use."""
+        return self._centroids is not None
+
+    def _normalize(self, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = vector.shape[0]
+        elif vector.shape[0] != self.dim:
+            raise ValueError(f"Expected vector of size {self.dim}, got {vector.shape[0]}")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _new_block(self, capacity):
+        return _VectorBlock(self.dim, capacity, self.growth_factor, self.quantization)
+
+    def _nearest_list(self, vector):
+        return int(np.argmax(self._centroids @ vector))
+
+    def add(self, vector):
+        """Add a vector and return its id."""
+        vector = self._normalize(vector)
+        if not self._blocks:
+            self._blocks.append(self._new_block(self.initial_capacity))
+
+        block_no = self._nearest_list(vector) if self.is_trained else 0
+        vector_id = self._next_id
+        self._next_id += 1
+        row = self._blocks[block_no].append(vector_id, vector)
+        self._locations[vector_id] = (block_no, row)
+
+        if self.mode == 'ivf' and not self.is_trained and len(self) >= self.train_size:
+            self.train()
+        return vector_id
+
+    def remove(self, vector_id):
+        """Remove a vector by id in O(1)."""
+        block_no, row = self._locations.pop(vector_id)
+        moved_id = self._blocks[block_no].remove_row(row)
+        if moved_id is not None:
+            self._locations[moved_id] = (block_no, row)
+
+    def get_vector(self, vector_id):
+        """Return a copy of the stored vector, decoded if quantized."""
+        block_no, row = self._locations[vector_id]
+        return self._blocks[block_no].decode(row)
+
+    def clear(self):
+        """Remove every vector and any trained IVF lists."""
+        self._blocks = []
+        self._centroids = None
+        self._locations = {}
+
+    def _all_vectors(self):
+        ids = np.concatenate([b.ids[:b.size] for b in self._blocks])
+        vectors = np.concatenate([b.decode() for b in self._blocks])
+        return ids, vectors
+
+    def train(self, iterations=10):
+        """Cluster the stored vectors into IVF lists with spherical k-means."""
+        if self.mode != 'ivf' or not len(self):
+            return
+        ids, vectors = self._all_vectors()
+        nlist = min(self.nlist, len(ids))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), nlist * 256), replace=False)]
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+        self._centroids = centroids
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        per_list = np.bincount(assignment, minlength=nlist)
+        self._blocks = [self._new_block(max(int(n * self.growth_factor), 16)) for n in per_list]
+        self._locations = {}
+        for vector_id, vector, block_no in zip(ids.tolist(), vectors, assignment.tolist()):
+            row = self._blocks[block_no].append(vector_id, vector)
+            self._locations[vector_id] = (block_no, row)
+
+    def _candidate_blocks(self, query):
+        if not self.is_trained:
+            return self._blocks
+        nprobe = min(self.nprobe, len(self._centroids))
+        centroid_scores = self._centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return [self._blocks[i] for i in probe]
+
+    def search(self, query, k=1, threshold=None):
+        """
+        Find the vectors most similar to ``query``.
+
+        Args:
+            query: Query embedding (need not be normalized)
+            k: Maximum number of results
+            threshold: Optional minimum cosine similarity
+
+        Returns:
+            List of (id, score) pairs, best match first
+        """
+        if not len(self) or k <= 0:
+            return []
+        query = self._normalize(query)
+
+        blocks = [b for b in self._candidate_blocks(query) if b.size]
+        if not blocks:
+            return []
+        query_bits = np.packbits(query > 0) if self.quantization == 'binary' else None
+        results = [b.search(query, query_bits, k, k * self.rescore_factor) for b in blocks]
+        ids = np.concatenate([block_ids for block_ids, _ in results])
+        scores = np.concatenate([block_scores for _, block_scores in results])
+
+        top = _top_k(scores, k)
+        if threshold is not None:
+            top = top[scores[top] >= threshold]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def measure_recall(vectors, queries, k=10, **index_options):
+    """
+    Recall@k of an index configuration against exact float32 search.
+
+    Args:
+        vectors: 2-D array of vectors to index
+        queries: 2-D array of query vectors
+        k: Number of neighbours compared per query
+        **index_options: VectorIndex options for the index under test
+
+    Returns:
+        Mean fraction of the exact top-k that the tested index also returns
+    """
+    exact = VectorIndex()
+    tested = VectorIndex(**index_options)
+    for vector in vectors:
+        exact.add(vector)
+        tested.add(vector)
+
+    hits = 0
+    for query in queries:
+        expected = {vector_id for vector_id, _ in exact.search(query, k=k)}
+        found = {vector_id for vector_id, _ in tested.search(query, k=k)}
+        hits += len(expected & found)
+    return hits / (len(queries) * k)
+
+
+def main():
+    """Compare memory, latency and recall of the storage modes."""
+    parser = argparse.ArgumentParser(description="Benchmark VectorIndex quantization modes")
+    parser.add_argument("--vectors", help=".npy file of embeddings (random vectors if omitted)")
+    parser.add_argument("--count", type=int, default=20000, help="random vectors to generate")
+    parser.add_argument("--dim", type=int, default=384, help="size of random vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = rng.standard_normal((args.count, args.dim)).astype(np.float32)
+    # Queries are perturbed copies of stored vectors, like near-duplicate sentences
+    picks = rng.choice(len(vectors), args.queries)
+    queries = vectors[picks] + 0.5 * rng.standard_normal((args.queries, vectors.shape[1])).astype(np.float32)
+
+    print(f"{'mode':10} | {'MB':>8} | {'ms/query':>8} | recall@{args.k}")
+    print("-" * 45)
+    for quantization in QUANTIZATIONS:
+        index = VectorIndex(quantization=quantization, initial_capacity=len(vectors))
+        for vector in vectors:
+            index.add(vector)
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, k=args.k)
+        latency = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = measure_recall(vectors, queries, k=args.k, quantization=quantization)
+        print(f"{quantization:10} | {index.nbytes / 1e6:8.2f} | {latency:8.3f} | {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
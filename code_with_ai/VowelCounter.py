@@ -1,7 +1,47 @@
 #!/usr/bin/env python3
 """
 VowelCounter.py - Simple vowel counting with data ingestion
+
+Files are processed as UTF-8 bytes: words are runs of non-whitespace bytes
+(ASCII whitespace), and vowels are counted with a table-driven kernel, using
+NumPy when it is installed and bytes.translate otherwise. count_vowels is
+kept as the reference implementation.
+
+With --incremental a checkpoint is kept next to each input, so append-only
+logs are only scanned from where the previous run stopped; --watch polls the
+files and updates the totals as they grow.
 """
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_SIZE = 1 << 20  # bytes read per chunk when streaming a file
+MMAP_THRESHOLD = 64 << 20  # files at least this large are scanned in place through mmap
+MMAP_WINDOW = 4 << 20  # bytes of a mapped file counted at a time
+RANGE_SIZE = 16 << 20  # bytes of a file handled by one parallel task
+CHECKPOINT_SUFFIX = '.vowels.json'  # incremental state is stored in <file>.vowels.json
+WHITESPACE_BYTES = b' \t\n\r\x0b\x0c'
+VOWEL_BYTES = b'aeiouAEIOU'
+WORD_PATTERN = re.compile(rb'[^ \t\n\r\x0b\x0c]+')
+STR_VOWEL_TABLE = str.maketrans('', '', VOWEL_BYTES.decode())
+# Byte lookup tables: 1 for vowels, and 1 for bytes that belong to a word
+VOWEL_FLAGS = bytes(1 if byte in VOWEL_BYTES else 0 for byte in range(256))
+WORD_FLAGS = bytes(0 if byte in WHITESPACE_BYTES else 1 for byte in range(256))
+
+if np is not None:
+    WORD_LUT = np.frombuffer(WORD_FLAGS, dtype=np.int8)
 
 def count_vowels(word):
     """Count vowels in a word"""
@@ -12,25 +52,405 @@ def count_vowels(word):
             count += 1
     return count
 
-def process_text_file(filename):
-    """Read words from a text file and count vowels"""
+def count_vowels_translate(word):
+    """Count vowels in a str or bytes word with one C-level translate call"""
+    if isinstance(word, str):
+        return len(word) - len(word.translate(STR_VOWEL_TABLE))
+    return len(word) - len(word.translate(None, VOWEL_BYTES))
+
+def word_vowel_counts(data):
+    """Find the words in a bytes-like buffer and count their vowels
+    
+    Returns:
+        (starts, ends, counts) - byte offsets of each word and its vowel count
+    """
+    if np is None:
+        matches = list(WORD_PATTERN.finditer(data))
+        return ([m.start() for m in matches], [m.end() for m in matches],
+                [count_vowels_translate(m.group()) for m in matches])
+    
+    if not isinstance(data, bytes):
+        # A window of a mapped file: one memcpy is cheaper than NumPy table gathers
+        data = bytes(data)
+    # bytes.translate applies the lookup tables in C; NumPy views the results
+    is_vowel = np.frombuffer(data.translate(VOWEL_FLAGS), dtype=np.uint8)
+    is_word = np.frombuffer(data.translate(WORD_FLAGS), dtype=np.int8)
+    edges = np.diff(is_word, prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return starts, ends, np.zeros(0, dtype=np.int64)
+    # Each segment runs from a word start to the next one; the whitespace in
+    # between holds no vowels, so segment sums are per-word counts
+    counts = np.add.reduceat(is_vowel, starts, dtype=np.int64)
+    return starts, ends, counts
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, 'tolist') else values
+
+class VowelSummary:
+    """Running word and vowel totals that can be merged across chunks"""
+    
+    def __init__(self):
+        self.words = 0
+        self.vowels = 0
+        self.histogram = Counter()  # vowels per word -> number of words
+    
+    def add(self, vowel_count):
+        self.words += 1
+        self.vowels += vowel_count
+        self.histogram[vowel_count] += 1
+    
+    def add_counts(self, counts):
+        """Add the vowel counts of many words at once"""
+        if np is not None and isinstance(counts, np.ndarray):
+            if not len(counts):
+                return
+            self.words += len(counts)
+            self.vowels += int(counts.sum())
+            histogram = np.bincount(counts)
+            for vowel_count in np.flatnonzero(histogram).tolist():
+                self.histogram[vowel_count] += int(histogram[vowel_count])
+            return
+        for vowel_count in counts:
+            self.add(vowel_count)
+    
+    def merge(self, other):
+        self.words += other.words
+        self.vowels += other.vowels
+        self.histogram.update(other.histogram)
+        return self
+    
+    def to_dict(self):
+        return {'words': self.words, 'vowels': self.vowels,
+                'histogram': {str(k): v for k, v in self.histogram.items()}}
+    
+    @classmethod
+    def from_dict(cls, state):
+        summary = cls()
+        summary.words = state['words']
+        summary.vowels = state['vowels']
+        summary.histogram.update({int(k): v for k, v in state['histogram'].items()})
+        return summary
+    
+    def report(self):
+        """Summary lines for printing"""
+        average = self.vowels / self.words if self.words else 0
+        lines = [
+            f"Words: {self.words}",
+            f"Vowels: {self.vowels}",
+            f"Average vowels per word: {average:.2f}",
+        ]
+        for vowel_count in sorted(self.histogram):
+            lines.append(f"  {vowel_count} vowels: {self.histogram[vowel_count]} words")
+        return "\n".join(lines)
+
+def read_word_chunks(file, end=None, chunk_size=CHUNK_SIZE, carry=b''):
+    """Yield byte chunks from a binary file's position up to end, never splitting a word
+    
+    The partial word at the end of each read is carried over to the next
+    one, so every chunk holds whole words only. carry is prepended to the
+    first read. Every chunk ends in whitespace except a trailing partial word.
+    """
+    remaining = end - file.tell() if end is not None else None
+    while remaining is None or remaining > 0:
+        data = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+        if not data:
+            break
+        if remaining is not None:
+            remaining -= len(data)
+        data = carry + data
+        cut = max(data.rfind(byte) for byte in WHITESPACE_BYTES) + 1
+        carry = data[cut:]
+        if cut:
+            yield data[:cut]
+    if carry:
+        yield carry
+
+def _word_boundary_before(mapped, start, limit):
+    """Offset just past the last whitespace byte in mapped[start:limit], or None"""
+    while limit > start:
+        window_start = max(start, limit - 4096)
+        spaces = np.flatnonzero(WORD_LUT[mapped[window_start:limit]] == 0)
+        if len(spaces):
+            return window_start + int(spaces[-1]) + 1
+        limit = window_start
+    return None
+
+def iter_mapped_chunks(filename, start=0, end=None, window=MMAP_WINDOW):
+    """Yield zero-copy windows of a memory-mapped file that never split a word
+    
+    The file is scanned in place; parallel workers mapping the same file
+    share its pages in the OS page cache.
+    """
+    if os.path.getsize(filename) == 0:
+        return
+    mapped = np.memmap(filename, dtype=np.uint8, mode='r')
+    end = len(mapped) if end is None else end
+    position = start
+    while position < end:
+        limit = min(position + window, end)
+        cut = _word_boundary_before(mapped, position, limit) if limit < end else limit
+        while cut is None:
+            # One word longer than the window: widen until it ends
+            limit = min(limit + window, end)
+            cut = _word_boundary_before(mapped, position, limit) if limit < end else limit
+        yield mapped[position:cut]
+        position = cut
+
+def iter_file_chunks(filename, start=0, end=None, chunk_size=CHUNK_SIZE, mmap_threshold=MMAP_THRESHOLD):
+    """Yield whole-word chunks of bytes [start, end) of a file
+    
+    Files of at least mmap_threshold bytes are mapped and scanned in place
+    when NumPy is available; smaller ones are read in chunks.
+    """
+    if np is not None and os.path.getsize(filename) >= mmap_threshold:
+        yield from iter_mapped_chunks(filename, start, end)
+        return
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        yield from read_word_chunks(file, end, chunk_size)
+
+def count_chunk(data, summary, with_lines=True):
+    """Count the words of a chunk into summary and return their output lines"""
+    starts, ends, counts = word_vowel_counts(data)
+    summary.add_counts(counts)
+    if not with_lines:
+        return ''
+    return ''.join(
+        f"'{bytes(data[start:end]).decode('utf-8', 'replace')}' has {count} vowels\n"
+        for start, end, count in zip(_as_list(starts), _as_list(ends), _as_list(counts))
+    )
+
+def split_byte_ranges(filename, range_size=RANGE_SIZE):
+    """Split a file into byte ranges that start and end on whitespace"""
+    size = os.path.getsize(filename)
+    ranges = []
+    start = 0
+    with open(filename, 'rb') as file:
+        while start < size:
+            end = min(start + range_size, size)
+            # Move the boundary forward past the word it falls in
+            file.seek(end)
+            while end < size:
+                data = file.read(4096)
+                if not data:
+                    break
+                offsets = [data.find(b) for b in WHITESPACE_BYTES]
+                offsets = [o for o in offsets if o >= 0]
+                if offsets:
+                    end += min(offsets)
+                    break
+                end += len(data)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def count_byte_range(task):
+    """Count vowels in one byte range of a file (runs in a worker process)
+    
+    Returns the range's VowelSummary and, unless summary_only, its per-word
+    output lines as one string.
+    """
+    filename, start, end, summary_only = task
+    summary = VowelSummary()
+    lines = []
+    for data in iter_file_chunks(filename, start, end):
+        lines.append(count_chunk(data, summary, not summary_only))
+    return summary, ''.join(lines)
+
+def is_checkpoint(filename):
+    """Whether a file is incremental-mode state (or its temporary copy) rather than text"""
+    return filename.endswith((CHECKPOINT_SUFFIX, CHECKPOINT_SUFFIX + '.tmp'))
+
+def collect_files(paths):
+    """Expand files, directories (recursively) and glob patterns into file names
+    
+    Checkpoint files found in directories or by globs are skipped.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if not is_checkpoint(name))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            files.extend(name for name in sorted(glob.glob(path, recursive=True)) if not is_checkpoint(name))
+    return files
+
+def parallel_count(paths, workers=None, summary_only=True, ordered=False, output=None,
+                   range_size=RANGE_SIZE):
+    """Count vowels in files, directories or globs on a pool of processes
+    
+    Large files are split into whitespace-aligned byte ranges so every core
+    gets work. Per-word lines come out in file order when ordered is True,
+    otherwise in completion order.
+    """
+    output = output or sys.stdout
+    tasks = [
+        (filename, start, end, summary_only)
+        for filename in collect_files(paths)
+        for start, end in split_byte_ranges(filename, range_size)
+    ]
+    
+    total = VowelSummary()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if ordered:
+            results = pool.map(count_byte_range, tasks)
+        else:
+            results = (future.result() for future in
+                       as_completed([pool.submit(count_byte_range, task) for task in tasks]))
+        for summary, lines in results:
+            output.write(lines)
+            total.merge(summary)
+    
+    print("-" * 40, file=output)
+    print(total.report(), file=output)
+    return total
+
+def process_text_file(filename, summary_only=False, output=None, chunk_size=CHUNK_SIZE,
+                      mmap_threshold=MMAP_THRESHOLD):
+    """Stream words from a text file and count vowels
+    
+    Per-word lines are written in one batch per chunk; with summary_only
+    only the aggregated totals are printed. Memory use does not grow with
+    the file size. Files of at least mmap_threshold bytes are memory-mapped
+    and scanned without decoding.
+    """
+    output = output or sys.stdout
     try:
-        with open(filename, 'r') as file:
-            content = file.read()
-            words = content.split()
-            
-            print(f"Processing {len(words)} words from {filename}:")
-            print("-" * 40)
-            
-            for word in words:
-                vowel_count = count_vowels(word)
-                print(f"'{word}' has {vowel_count} vowels")
+        size = os.path.getsize(filename)
+        print(f"Processing {size} bytes of words from {filename}:", file=output)
+        print("-" * 40, file=output)
+        
+        summary = VowelSummary()
+        for data in iter_file_chunks(filename, chunk_size=chunk_size, mmap_threshold=mmap_threshold):
+            output.write(count_chunk(data, summary, not summary_only))
+        
+        print("-" * 40, file=output)
+        print(summary.report(), file=output)
+        return summary
                 
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found")
     except Exception as e:
         print(f"Error reading file: {e}")
 
+def checkpoint_path(filename):
+    return filename + CHECKPOINT_SUFFIX
+
+def load_checkpoint(filename):
+    """Return the saved incremental state of a file, or None"""
+    try:
+        with open(checkpoint_path(filename)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def save_checkpoint(filename, state):
+    """Atomically replace the checkpoint of a file"""
+    path = checkpoint_path(filename)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def count_appended(filename, summary_only=True, output=None, chunk_size=CHUNK_SIZE):
+    """Count only the bytes appended to a file since its last checkpoint
+    
+    The checkpoint holds the byte offset reached, the partial word at the
+    end of the file (counted once whitespace follows it) and the running
+    totals. A file that shrank or was replaced starts again from the top.
+    Returns the updated VowelSummary.
+    """
+    output = output or sys.stdout
+    stat = os.stat(filename)
+    state = load_checkpoint(filename)
+    if state is None or state['inode'] != stat.st_ino or stat.st_size < state['offset']:
+        if state is not None:
+            print(f"{filename} was truncated or replaced, counting from the start", file=output)
+        state = {'inode': stat.st_ino, 'offset': 0, 'partial': '', 'summary': VowelSummary().to_dict()}
+    
+    summary = VowelSummary.from_dict(state['summary'])
+    partial = bytes.fromhex(state['partial'])
+    with open(filename, 'rb') as file:
+        file.seek(state['offset'])
+        # Stop at the size seen above so a concurrent writer cannot move the offset past a torn read
+        for data in read_word_chunks(file, stat.st_size, chunk_size, carry=partial):
+            if data[-1] in WHITESPACE_BYTES:
+                output.write(count_chunk(data, summary, not summary_only))
+                partial = b''
+            else:
+                partial = data
+        offset = file.tell()
+    
+    save_checkpoint(filename, {'inode': stat.st_ino, 'offset': offset, 'partial': partial.hex(),
+                               'summary': summary.to_dict()})
+    return summary
+
+def watch_files(filenames, interval=1.0, summary_only=True, output=None):
+    """Poll files and print updated totals whenever one of them grows
+    
+    Runs until interrupted; state is checkpointed after every update, so a
+    restarted watch carries on where the last one stopped.
+    """
+    output = output or sys.stdout
+    seen = {}
+    while True:
+        for filename in filenames:
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if seen.get(filename) == signature:
+                continue
+            seen[filename] = signature
+            summary = count_appended(filename, summary_only, output)
+            print(f"--- {filename} at {time.strftime('%H:%M:%S')} ---", file=output)
+            print(summary.report(), file=output)
+            output.flush()
+        time.sleep(interval)
+
+def benchmark_kernels(size_mb=16, seed=0):
+    """Compare throughput of the reference loop and the fast kernels
+    
+    Returns a dict of kernel name -> MB/s and checks they agree.
+    """
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyzAEIOU'
+    vocabulary = [''.join(rng.choice(letters) for _ in range(rng.randint(1, 12))) for _ in range(5000)]
+    words = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        word = rng.choice(vocabulary)
+        words.append(word)
+        size += len(word) + 1
+    text = ' '.join(words)
+    data = text.encode('utf-8')
+    megabytes = len(data) / (1024 * 1024)
+    
+    kernels = {
+        'reference (count_vowels)': lambda: sum(count_vowels(word) for word in text.split()),
+        'bytes.translate': lambda: sum(count_vowels_translate(word) for word in data.split()),
+    }
+    if np is not None:
+        kernels['numpy word offsets'] = lambda: int(word_vowel_counts(data)[2].sum())
+    
+    results = {}
+    expected = None
+    for name, kernel in kernels.items():
+        start = time.perf_counter()
+        total = kernel()
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            expected = total
+        elif total != expected:
+            raise AssertionError(f"{name} counted {total} vowels, reference counted {expected}")
+        results[name] = megabytes / elapsed
+        print(f"{name:26} {results[name]:10.1f} MB/s")
+    return results
+
 def process_user_input():
     """Get word from user input and count vowels"""
     word = input("Enter a word: ")
@@ -39,6 +459,46 @@ def process_user_input():
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Count vowels in words.")
+    parser.add_argument("files", nargs="*", help="text files to process (interactive menu if omitted)")
+    parser.add_argument("--summary", action="store_true", help="print only aggregated totals")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="count in N processes; files may also be directories or globs")
+    parser.add_argument("--ordered", action="store_true", help="keep per-word output in file order")
+    parser.add_argument("--benchmark", action="store_true", help="measure vowel counting throughput")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only count bytes appended since the last run (state in <file>{CHECKPOINT_SUFFIX})")
+    parser.add_argument("--watch", type=float, nargs="?", const=1.0, metavar="SECONDS",
+                        help="keep polling the files and update totals as they grow")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        benchmark_kernels()
+        return
+    
+    if args.files and args.watch:
+        try:
+            watch_files(args.files, args.watch, summary_only=args.summary)
+        except KeyboardInterrupt:
+            pass
+        return
+    
+    if args.files and args.incremental:
+        for filename in args.files:
+            summary = count_appended(filename, summary_only=args.summary)
+            print("-" * 40)
+            print(summary.report())
+        return
+    
+    if args.files and args.workers:
+        parallel_count(args.files, args.workers, summary_only=args.summary, ordered=args.ordered)
+        return
+    
+    if args.files:
+        for filename in args.files:
+            process_text_file(filename, summary_only=args.summary)
+        return
+    
     print("=== Vowel Counter ===")
     print("1. Count vowels in a word")
     print("2. Process words from a file")
@@ -1,33 +1,74 @@
 # WordReverser.py
 
+import os
+
 import streamlit as st
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from EmbeddingService import get_embedding_service
+from EmbeddingStore import EmbeddingStore
+from SelfRagMemory import TIERS, SelfRagMemory, normalize_text
+from VectorIndex import VectorIndex
+
+# Load the model only once; concurrent sessions share its micro-batches
+@st.cache_resource
+def load_embedder():
+    return get_embedding_service('all-MiniLM-L6-v2')
 
-# Load the model only once
+# Memory shared by every session and process on this machine
 @st.cache_resource
-def load_model():
-    return SentenceTransformer('all-MiniLM-L6-v2')
+def load_store():
+    return EmbeddingStore(os.environ.get("WORD_REVERSER_STORE", "word_reverser_memory"),
+                          key_func=normalize_text)
+
+embedder = load_embedder()
+store = load_store()
 
-model = load_model()
+# Memory settings
+st.sidebar.header("Memory Settings")
+index_mode = st.sidebar.selectbox("Index mode:", ["flat", "ivf"],
+                                  help="ivf clusters the memory and only scans the closest lists")
+quantization = st.sidebar.selectbox("Vector storage:", ["float32", "int8", "binary"],
+                                    help="int8 is ~4x and binary ~32x smaller; binary scores run lower than float ones")
+threshold = st.sidebar.slider("Similarity threshold:", 0.5, 1.0, 0.9, 0.01)
+max_entries = st.sidebar.number_input("Max entries:", min_value=1, value=10000, step=100)
+max_megabytes = st.sidebar.number_input("Max size (MB):", min_value=1, value=64)
+eviction_policy = st.sidebar.selectbox("Eviction policy:", ["lru", "lfu"])
+ttl_minutes = st.sidebar.number_input("Time to live (minutes, 0 = forever):", min_value=0, value=0)
+st.sidebar.caption("Changing these settings clears this session's memory; the shared memory is kept.")
 
 # Initialize memory in session state
-if "memory" not in st.session_state:
-    st.session_state.memory = []  # list of (embedding, input, output)
+memory_settings = (index_mode, quantization, max_entries, max_megabytes, eviction_policy, ttl_minutes)
+if st.session_state.get("memory_settings") != memory_settings:
+    st.session_state.memory = SelfRagMemory(
+        VectorIndex(mode=index_mode, quantization=quantization),
+        store,
+        max_entries=int(max_entries),
+        max_bytes=int(max_megabytes) * 1024 * 1024,
+        policy=eviction_policy,
+        ttl=ttl_minutes * 60 if ttl_minutes else None,
+    )
+    st.session_state.memory_settings = memory_settings
 
 def embed_text(text):
-    return model.encode([text])[0]
+    return embedder.submit(text).result()
 
 def retrieve_or_generate(sentence, threshold=0.9):
+    memory = st.session_state.memory
+
+    # Exact repeats skip the embedding model entirely
+    stored_output = memory.get_exact(sentence)
+    if stored_output is not None:
+        return stored_output, "⚡ Exact repeat from memory"
+
     query_vector = embed_text(sentence)
-    for stored_vector, stored_input, stored_output in st.session_state.memory:
-        score = cosine_similarity([query_vector], [stored_vector])[0][0]
-        if score >= threshold:
-            return stored_output, "📦 Retrieved from self memory"
+    stored_output, tier = memory.lookup(query_vector, threshold)
+    if tier == 'semantic':
+        return stored_output, "📦 Retrieved from self memory"
+    if tier == 'shared':
+        return stored_output, "💾 Retrieved from shared memory"
     
     # If not found
     result = ' '.join(word[::-1] for word in sentence.split())
-    st.session_state.memory.append((query_vector, sentence, result))
+    memory.add(query_vector, sentence, result)
     return result, "🧠 Newly computed"
 
 # UI with Streamlit
@@ -37,11 +78,28 @@ st.markdown("Reverse each word in a sentence. Cached using self-memory (RAG styl
 user_input = st.text_input("Enter a sentence:")
 
 if user_input:
-    output, status = retrieve_or_generate(user_input)
+    output, status = retrieve_or_generate(user_input, threshold)
     st.success(status)
     st.write("🔄 **Reversed Sentence:**", output)
 
 # Optional: Show memory for debug/demo
 with st.expander("🧠 View Self RAG Memory"):
-    for idx, (_, inp, out) in enumerate(st.session_state.memory):
+    for idx, (inp, out) in enumerate(st.session_state.memory):
         st.write(f"{idx+1}. **Input:** {inp} → **Output:** {out}")
+
+with st.expander("📊 Memory Statistics"):
+    stats = st.session_state.memory.stats
+    for tier in TIERS:
+        st.write(f"**{tier}:** {stats[tier]['hits']} hits, {stats[tier]['misses']} misses")
+    evictions = stats['evictions']
+    st.write(f"**evictions:** {evictions['capacity']} over entry limit, "
+             f"{evictions['bytes']} over size limit, {evictions['expired']} expired")
+    st.write(f"**size:** {len(st.session_state.memory)} entries, "
+             f"~{st.session_state.memory.nbytes / 1024:.1f} KB, "
+             f"vectors {st.session_state.memory.index.nbytes / 1024:.1f} KB allocated")
+
+with st.expander("💾 Shared Memory"):
+    st.write(f"{len(store)} records stored on disk")
+    if st.button("Compact shared memory"):
+        store.compact()
+        st.success("Shared memory compacted")
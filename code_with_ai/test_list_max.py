@@ -0,0 +1,57 @@
+"""
+Randomized checks of the ListMax fast paths against find_maximum, the reference.
+
+Values are small integers so ties are common. Run with ``pytest`` from this
+directory; ListMax needs Streamlit installed to import.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("streamlit")
+
+from ListMax import SlidingWindowMax, find_maximum, reduce_maximum
+
+TRIALS = 200
+
+
+def random_lists(seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(TRIALS):
+        yield rng, rng.integers(-20, 20, int(rng.integers(1, 200))).astype(np.float64).tolist()
+
+
+@pytest.mark.parametrize("kind", ["array", "list", "iterator"])
+def test_reduce_maximum_matches_find_maximum(kind):
+    for _, numbers in random_lists():
+        expected = find_maximum(numbers)
+        # Largest first, earliest position first among equal values
+        ranked = sorted(range(len(numbers)), key=lambda i: (-numbers[i], i))
+        for k in (1, 3, len(numbers)):
+            source = {'array': np.array(numbers), 'list': numbers, 'iterator': iter(numbers)}[kind]
+            assert reduce_maximum(source, k) == (expected, ranked[0], [(numbers[i], i) for i in ranked[:k]])
+
+
+def test_sliding_window_append_matches_find_maximum():
+    for rng, numbers in random_lists(1):
+        window = int(rng.integers(1, 20))
+        tracker = SlidingWindowMax(window)
+        for i, num in enumerate(numbers):
+            assert tracker.append(num) == find_maximum(numbers[max(0, i + 1 - window):i + 1])
+        assert tracker.global_max == find_maximum(numbers)
+
+
+def test_sliding_window_extend_matches_find_maximum():
+    for rng, numbers in random_lists(2):
+        window = int(rng.integers(1, 20))
+        split = int(rng.integers(0, len(numbers) + 1))
+        tracker = SlidingWindowMax(window)
+        tracker.extend(numbers[:split])
+        tracker.extend(numbers[split:])
+        assert tracker.maximum == find_maximum(numbers[-window:])
+        assert tracker.global_max == find_maximum(numbers)
+        assert tracker.count == len(numbers)
+
+
+def test_empty_input():
+    assert reduce_maximum([]) == (None, None, [])
+    assert find_maximum([]) is None